@@ -0,0 +1,418 @@
+import sys
+import os
+import io
+import random
+import tempfile
+import unittest
+import contextlib
+from fractions import Fraction
+
+# 获取当前文件夹和父目录路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+# 将父目录添加到 sys.path
+sys.path.insert(0, parent_dir)
+
+from Myapp import (Number, BinaryOp, CanonicalHashSet, tokenize, parse_expression_tree,  # 导入被测试的函数
+                   generate_valid_expression, exercise_expression, evaluate_lines, number_to_string,
+                   parse_number, grade, batch_grade, write_problems, iter_problem_texts,
+                   ExpressionSpace, iter_enumerated_problem_texts)
+
+
+def parse(expr_str):
+    return parse_expression_tree(tokenize(expr_str))
+
+
+def op(operator, left, right):
+    # 整数直接作为数值节点，方便手写表达式树
+    wrap = lambda node: Number(Fraction(node)) if isinstance(node, int) else node
+    return BinaryOp(operator, wrap(left), wrap(right))
+
+
+class TestCanonicalHashSet(unittest.TestCase):
+    def check_against_set(self, bits, digests):
+        hash_set = CanonicalHashSet(bits, capacity=4)
+        reference = set()
+        for digest in digests:
+            self.assertEqual(hash_set.add(digest), digest not in reference)
+            reference.add(digest)
+            self.assertEqual(len(hash_set), len(reference))
+        for digest in reference:
+            self.assertIn(digest, hash_set)
+        return hash_set, reference
+
+    def random_digests(self, rng, size, count):
+        # 集合把最低位强制置 1，参照集合中的哈希也预先置 1
+        digests = []
+        for _ in range(count):
+            digest = rng.randbytes(size)
+            digests.append(bytes([digest[0] | 1]) + digest[1:])
+        return digests
+
+    def test_matches_python_set_with_growth(self):
+        rng = random.Random(0)
+        for bits in (64, 128):
+            digests = self.random_digests(rng, bits // 8, 3000)
+            # 重复加入一部分，检查返回值
+            digests += digests[::7]
+            rng.shuffle(digests)
+            hash_set, reference = self.check_against_set(bits, digests)
+            for digest in self.random_digests(rng, bits // 8, 200):
+                self.assertEqual(digest in hash_set, digest in reference)
+            self.assertGreaterEqual(hash_set.memory_bytes(), len(reference) * bits // 8)
+
+    def test_colliding_slots(self):
+        # 第一个 64 位字相同、第二个字不同：落在同一个槽位，必须靠线性探测区分
+        prefix = (12345).to_bytes(8, 'little')
+        digests = [prefix + i.to_bytes(8, 'little') for i in range(50)]
+        hash_set, _ = self.check_against_set(128, digests)
+        self.assertNotIn(prefix + (999).to_bytes(8, 'little'), hash_set)
+        # 64 位：高位相同（初始槽位相同）、低位不同
+        digests = [((0x1234 << 48) | (i << 1) | 1).to_bytes(8, 'little') for i in range(50)]
+        hash_set, _ = self.check_against_set(64, digests)
+        self.assertNotIn(((0x1234 << 48) | (77 << 1) | 1).to_bytes(8, 'little'), hash_set)
+
+    def test_home_slots_use_whole_table(self):
+        # 最低位固定为 1，起始槽位不能只落在奇数槽上
+        rng = random.Random(4)
+        hash_set = CanonicalHashSet(64, capacity=10000)
+        for digest in self.random_digests(rng, 8, 1000):
+            hash_set.add(digest)
+        occupied = [slot for slot, word in enumerate(hash_set._slots) if word]
+        even = sum(1 for slot in occupied if slot % 2 == 0)
+        self.assertGreater(even, len(occupied) * 0.4)
+
+    def test_presized_memory(self):
+        # 按预计元素数建表时每个元素约 8 / MAX_LOAD 字节，比保存规范形式字符串的 set 小一个数量级
+        rng = random.Random(5)
+        hash_set = CanonicalHashSet(capacity=20000)
+        for digest in self.random_digests(rng, 8, 20000):
+            hash_set.add(digest)
+        self.assertEqual(len(hash_set), 20000)
+        self.assertLessEqual(hash_set.memory_bytes() / len(hash_set), 12)
+
+    def test_rejects_unsupported_bits(self):
+        with self.assertRaises(ValueError):
+            CanonicalHashSet(32)
+
+
+class TestDuplicateRules(unittest.TestCase):
+    def assertDuplicate(self, expr1, expr2, duplicate):
+        tree1, tree2 = parse(expr1), parse(expr2)
+        self.assertEqual(tree1.canonical() == tree2.canonical(), duplicate)
+        self.assertEqual(tree1.canonical_digest() == tree2.canonical_digest(), duplicate)
+
+    def test_commutative_swaps_are_duplicates(self):
+        self.assertDuplicate("1 + 2 + 3", "3 + (2 + 1)", True)
+        self.assertDuplicate("2 * 3", "3 * 2", True)
+        self.assertDuplicate("(1 + 2) * 3", "3 * (2 + 1)", True)
+        self.assertDuplicate("1/2 * (4 - 1)", "(4 - 1) * 1/2", True)
+
+    def test_other_changes_are_not_duplicates(self):
+        # 不做结合律展开
+        self.assertDuplicate("1 + 2 + 3", "3 + 2 + 1", False)
+        self.assertDuplicate("3 - 2", "2 - 3", False)
+        self.assertDuplicate("1 / 2", "2 / 1", False)
+        self.assertDuplicate("1 + 2", "1 * 2", False)
+        self.assertDuplicate("2 * 3 + 1", "2 * (3 + 1)", False)
+
+    def test_digest_agrees_with_canonical(self):
+        rng = random.Random(1)
+        trees = [generate_valid_expression(1, 3, 4, rng) for _ in range(2000)]
+        forms = {}
+        digests = {}
+        for tree in trees:
+            forms.setdefault(tree.canonical(), set()).add(tree.canonical_digest())
+            digests.setdefault(tree.canonical_digest(), set()).add(tree.canonical())
+        self.assertTrue(all(len(group) == 1 for group in forms.values()))
+        self.assertTrue(all(len(group) == 1 for group in digests.values()))
+
+
+class TestExpressionTree(unittest.TestCase):
+    def test_parenthesization(self):
+        cases = [
+            (op('-', 1, op('-', 2, 1)), "1 - (2 - 1)"),
+            (op('-', op('-', 5, 2), 1), "5 - 2 - 1"),
+            (op('*', op('+', 1, 2), 3), "(1 + 2) * 3"),
+            (op('+', 1, op('*', 2, 3)), "1 + 2 * 3"),
+            (op('/', 1, op('*', 2, 3)), "1 / (2 * 3)"),
+            (op('+', 1, op('+', 2, 3)), "1 + (2 + 3)"),
+            (op('*', Number(Fraction(5, 2)), Number(Fraction(1, 3))), "2'1/2 * 1/3"),
+        ]
+        for tree, expected in cases:
+            self.assertEqual(tree.render(), expected)
+
+    def test_render_parse_round_trip(self):
+        rng = random.Random(2)
+        for _ in range(2000):
+            tree = generate_valid_expression(1, 3, 10, rng)
+            parsed = parse(tree.render())
+            self.assertEqual(parsed.render(), tree.render())
+            self.assertEqual(parsed.canonical(), tree.canonical())
+            self.assertEqual(parsed.value, tree.value)
+
+    def test_values_and_zero_division(self):
+        self.assertEqual(parse("1/2 + 1/3 * 3").value, Fraction(3, 2))
+        self.assertEqual(parse("2'1/2 - 1/2").value, 2)
+        with self.assertRaises(ZeroDivisionError):
+            parse("1 / (2 - 2)")
+
+
+def reference_value(ex_line):
+    # 参照实现：对解析树求值，无法解析或除数为零时记为 None
+    try:
+        return parse_expression_tree(tokenize(exercise_expression(ex_line))).value
+    except Exception:
+        return None
+
+
+class TestEvaluateLines(unittest.TestCase):
+    def check(self, lines):
+        values = evaluate_lines(lines)
+        expected = [reference_value(line) for line in lines]
+        self.assertEqual(values, expected)
+        for value, reference in zip(values, expected):
+            if value is not None:
+                self.assertEqual((value.numerator, value.denominator), (reference.numerator, reference.denominator))
+
+    def test_generated_lines(self):
+        rng = random.Random(3)
+        lines = [f"{i}. {generate_valid_expression(1, 3, 10, rng).render()} =\n" for i in range(1, 3001)]
+        self.check(lines)
+
+    def test_malformed_lines(self):
+        lines = ["1. 1 + =", "2. (1 + 2 =", "3. 1 + * 2 =", "", "4. abc ="]
+        self.check(lines)
+        self.assertEqual(evaluate_lines(lines), [None] * 5)
+        # 解析器忽略多余的尾部标记，快速求值必须保持同样的行为
+        self.check(["1. 1 + 2 ) =", "2. 1 2 =", "3. 1'1/0 + 1 =", "4. 1 + 2 ="])
+
+    def test_division_by_zero(self):
+        lines = ["1. 1 / 0 =", "2. 3/0 + 1 =", "3. 1'1/2 / (1/2 - 1/2) =", "4. 2 / (3 - 3) * 5 ="]
+        self.check(lines)
+        self.assertEqual(evaluate_lines(lines), [None] * 4)
+
+    def test_negative_intermediates(self):
+        lines = ["1. 1 - 2 + 3 =", "2. 1/2 - 3/4 + 1 =", "3. (1 - 2) * (1 - 3) =", "4. 1 / (1 - 2) =",
+                 "5. 2 - 3 ="]
+        self.check(lines)
+        self.assertEqual([number_to_string(value) for value in evaluate_lines(lines)],
+                         ["2", "3/4", "2", "-1", "-1"])
+
+    def test_same_skeleton_with_different_outcomes(self):
+        # 同一骨架的编译结果被缓存，后面的题目不能沿用前面题目的值或异常
+        lines = ["1. 1 / 0 =", "2. 1 / 2 =", "3. 4 / (2 - 2) =", "4. 4 / (3 - 2) ="]
+        self.check(lines)
+
+
+def old_grade(exercise_file, answer_file):
+    """
+    重构前的批改逻辑（整文件读入、逐题解析求值），作为批改结果的参照，返回结果文件内容。
+    """
+    with open(exercise_file, 'r', encoding='utf-8') as f_ex:
+        exercises = f_ex.readlines()
+    with open(answer_file, 'r', encoding='utf-8') as f_ans:
+        answers = f_ans.readlines()
+    if len(exercises) != len(answers):
+        return None
+    correct = []
+    wrong = []
+    for idx, (ex_line, ans_line) in enumerate(zip(exercises, answers), 1):
+        try:
+            ans_str = ans_line.strip()
+            if '.' in ans_str:
+                ans_str = ans_str.split('.', 1)[1].strip()
+            if parse_expression_tree(tokenize(exercise_expression(ex_line))).value == parse_number(ans_str):
+                correct.append(idx)
+            else:
+                wrong.append(idx)
+        except Exception:
+            wrong.append(idx)
+    return (f"Correct: {len(correct)} ({', '.join(map(str, correct))})\n"
+            f"Wrong: {len(wrong)} ({', '.join(map(str, wrong))})\n")
+
+
+class TestGrade(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.exercise_file = os.path.join(self.tmp.name, 'Exercises.txt')
+        self.answer_file = os.path.join(self.tmp.name, 'Answers.txt')
+        self.grade_file = os.path.join(self.tmp.name, 'Grade.txt')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_files(self, exercise_text, answer_text):
+        for path, text in ((self.exercise_file, exercise_text), (self.answer_file, answer_text)):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+
+    def sample_files(self, n=500):
+        # 生成题目后篡改部分答案，并混入无法解析和除数为零的题目
+        write_problems(iter_problem_texts(n, 10, seed=4), self.exercise_file, self.answer_file)
+        with open(self.exercise_file, 'r', encoding='utf-8') as f:
+            exercises = f.readlines()
+        with open(self.answer_file, 'r', encoding='utf-8') as f:
+            answers = f.readlines()
+        exercises[3] = "4. 1 + * 2 =\n"
+        exercises[5] = "6. 1 / (2 - 2) =\n"
+        for i in range(0, n, 3):
+            answers[i] = f"{i + 1}. 0'1/7\n"
+        answers[9] = "10. abc\n"
+        answers[10] = "\n"
+        return ''.join(exercises), ''.join(answers)
+
+    def read_grade(self):
+        with open(self.grade_file, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def test_matches_old_grader(self):
+        exercise_text, answer_text = self.sample_files()
+        cases = [
+            (exercise_text, answer_text),
+            # 最后一行没有换行符
+            (exercise_text.rstrip('\n'), answer_text.rstrip('\n')),
+            (exercise_text, answer_text.rstrip('\n')),
+            ("", ""),
+        ]
+        for exercise, answer in cases:
+            self.write_files(exercise, answer)
+            for chunk_size in (7, 20000):
+                grade(self.exercise_file, self.answer_file, self.grade_file, chunk_size=chunk_size)
+                self.assertEqual(self.read_grade(), old_grade(self.exercise_file, self.answer_file))
+
+    def test_mismatched_line_counts(self):
+        exercise_text, answer_text = self.sample_files(20)
+        for exercise, answer in ((exercise_text, answer_text + "21. 1\n"),
+                                 (exercise_text + "\n", answer_text),
+                                 (exercise_text, "")):
+            self.write_files(exercise, answer)
+            self.assertIsNone(old_grade(self.exercise_file, self.answer_file))
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output), self.assertRaises(SystemExit) as cm:
+                grade(self.exercise_file, self.answer_file, self.grade_file)
+            self.assertEqual(cm.exception.code, 1)
+            self.assertEqual(output.getvalue(), "题目数与答案数不一致。\n")
+            self.assertFalse(os.path.exists(self.grade_file))
+
+    def test_workers_give_identical_grade(self):
+        self.write_files(*self.sample_files())
+        results = []
+        for workers in (1, 2):
+            grade(self.exercise_file, self.answer_file, self.grade_file, workers=workers, chunk_size=37)
+            results.append(self.read_grade())
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], old_grade(self.exercise_file, self.answer_file))
+
+    def test_batch_grade_keeps_extensions_apart(self):
+        exercise_text, answer_text = self.sample_files(30)
+        self.write_files(exercise_text, answer_text)
+        answer_dir = os.path.join(self.tmp.name, 'answers')
+        grade_dir = os.path.join(self.tmp.name, 'grades')
+        os.makedirs(answer_dir)
+        with open(self.answer_file, 'r', encoding='utf-8') as f:
+            answers = f.readlines()
+        submissions = {
+            'alice.txt': ''.join(answers),
+            'alice.csv': ''.join(answers[:15]) + ''.join(f"{i}. 0\n" for i in range(16, 31)),
+            'bob.txt': ''.join(answers[:-1]),
+            '.alice.txt': ''.join(answers),
+        }
+        for name, text in submissions.items():
+            with open(os.path.join(answer_dir, name), 'w', encoding='utf-8') as f:
+                f.write(text)
+        with contextlib.redirect_stdout(io.StringIO()):
+            batch_grade(self.exercise_file, answer_dir, grade_dir)
+
+        self.assertEqual(sorted(os.listdir(grade_dir)), ['Summary.txt', 'alice.csv_Grade.txt', 'alice.txt_Grade.txt'])
+        for name in ('alice.txt', 'alice.csv'):
+            with open(os.path.join(grade_dir, name + '_Grade.txt'), 'r', encoding='utf-8') as f:
+                self.assertEqual(f.read(), old_grade(self.exercise_file, os.path.join(answer_dir, name)))
+        with open(os.path.join(grade_dir, 'Summary.txt'), 'r', encoding='utf-8') as f:
+            summary = f.read().splitlines()
+        self.assertEqual(summary[0], "Exercises: 30")
+        self.assertEqual([line.split(':')[0] for line in summary[1:]], ['alice.csv', 'alice.txt', 'bob.txt'])
+        self.assertNotEqual(summary[1].split(':')[1], summary[2].split(':')[1])
+        self.assertEqual(summary[3], "bob.txt: 题目数与答案数不一致。")
+
+    def test_batch_grade_missing_answer_dir(self):
+        self.write_files(*self.sample_files(20))
+        answer_dir = os.path.join(self.tmp.name, 'missing')
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), self.assertRaises(SystemExit) as cm:
+            batch_grade(self.exercise_file, answer_dir, os.path.join(self.tmp.name, 'grades'))
+        self.assertEqual(cm.exception.code, 1)
+        self.assertEqual(output.getvalue(), f"答案目录不存在：{answer_dir}\n")
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'grades')))
+
+
+class TestGenerate(unittest.TestCase):
+    def test_same_seed_across_workers(self):
+        # 跨越多个块，且后面的块中有与前面重复、需要丢弃的题目
+        serial = list(iter_problem_texts(2500, 4, seed=5, workers=1))
+        self.assertEqual(len(serial), 2500)
+        self.assertEqual(len({parse_expression_tree(tokenize(exercise)).canonical() for exercise, _ in serial}), 2500)
+        self.assertEqual(list(iter_problem_texts(2500, 4, seed=5, workers=2)), serial)
+        self.assertNotEqual(list(iter_problem_texts(2500, 4, seed=6, workers=1)), serial)
+
+
+def brute_force_canonicals(range_limit, max_operators=3):
+    """
+    穷举 generate_valid_expression 能生成的全部题目，返回规范形式集合。
+    """
+    values = {Fraction(value) for value in range(range_limit)}
+    values |= {Fraction(numerator, denominator)
+               for denominator in range(2, range_limit) for numerator in range(1, denominator)}
+    trees = [[Number(value) for value in values]]
+    for operators in range(1, max_operators + 1):
+        level = []
+        for left_operators in range(operators):
+            for left in trees[left_operators]:
+                for right in trees[operators - 1 - left_operators]:
+                    for operator in '+-*/':
+                        try:
+                            node = BinaryOp(operator, left, right)
+                        except ZeroDivisionError:
+                            continue
+                        if operator == '-' and left.value < right.value:
+                            continue
+                        if operator == '/' and not 0 < abs(node.num) < node.den:
+                            continue
+                        level.append(node)
+        trees.append(level)
+    return {tree.canonical() for level in trees[1:] for tree in level}
+
+
+class TestExpressionSpace(unittest.TestCase):
+    def test_matches_brute_force(self):
+        for range_limit, total in ((2, 664), (3, 9422)):
+            space = ExpressionSpace(range_limit)
+            self.assertEqual(len(space), total)
+            canonicals = [space[i].canonical() for i in range(len(space))]
+            self.assertEqual(len(set(canonicals)), total)
+            self.assertEqual(set(canonicals), brute_force_canonicals(range_limit))
+
+    def test_sample_covers_space(self):
+        space = ExpressionSpace(2)
+        problems = list(iter_enumerated_problem_texts(len(space), 2, seed=7, space=space))
+        self.assertEqual(len({parse_expression_tree(tokenize(exercise)).canonical() for exercise, _ in problems}),
+                         len(space))
+        for exercise, answer in problems:
+            self.assertEqual(number_to_string(parse_expression_tree(tokenize(exercise)).value), answer)
+
+    def test_too_many_problems_fail_fast(self):
+        problems = iter_enumerated_problem_texts(9423, 3, seed=7)
+        with self.assertRaises(ValueError):
+            next(problems)
+
+    def test_rejects_large_range(self):
+        with self.assertRaises(ValueError):
+            ExpressionSpace(4, max_nodes=1000)
+        # 超过上限时在展开之前就报错，数值范围很大也不会耗尽内存
+        for range_limit in (13, 10 ** 9):
+            with self.assertRaises(ValueError):
+                ExpressionSpace(range_limit)
+
+
+if __name__ == '__main__':
+    unittest.main()
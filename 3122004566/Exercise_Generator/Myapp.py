@@ -1,8 +1,17 @@
 import argparse  # 用于解析命令行参数
 import random    # 用于生成随机数
 import sys       # 用于退出程序
+import os        # 用于获取 CPU 核心数
 from fractions import Fraction  # 用于处理分数
 import re        # 用于正则表达式
+import hashlib   # 用于计算题目规范形式的哈希
+from array import array  # 用于紧凑存储哈希值
+import itertools # 用于生成任务编号
+import bisect    # 用于在按值排序的子表达式中查找
+import math      # 用于枚举时计算最大公约数和平方根
+import collections  # 用于限制排队的任务数
+import tempfile  # 用于批改时暂存题号
+from concurrent.futures import ProcessPoolExecutor  # 用于并行生成题目和批改
 
 def number_to_string(number):
     """
@@ -20,23 +29,24 @@ def number_to_string(number):
         # 如果是真分数
         return f"{number.numerator}/{number.denominator}"
 
-def generate_number(range_limit):
+def generate_number(range_limit, rng=random):
     """
     生成一个随机的自然数或真分数，范围在 [0, range_limit)。
+    rng 为随机数来源，默认使用全局的 random 模块。
     """
-    if random.choice(['natural', 'fraction']) == 'natural':
+    if rng.choice(['natural', 'fraction']) == 'natural':
         # 生成自然数
-        return Fraction(random.randint(0, range_limit - 1))
+        return Fraction(rng.randint(0, range_limit - 1))
     else:
         # 生成真分数
-        denominator = random.randint(2, range_limit - 1)  # 分母
-        numerator = random.randint(1, denominator - 1)    # 分子
+        denominator = rng.randint(2, range_limit - 1)  # 分母
+        numerator = rng.randint(1, denominator - 1)    # 分子
         return Fraction(numerator, denominator)
 
-def parse_number(s):
+def parse_number_parts(s):
     """
-    将字符串形式的数值解析为 Fraction 类型。
-    支持整数、真分数和带分数。
+    将字符串形式的数值解析为未约分的 (分子, 分母)，支持整数、真分数和带分数。
+    分母为零时抛出 ZeroDivisionError。
     """
     s = s.strip()
     if "'" in s:
@@ -44,14 +54,23 @@ def parse_number(s):
         whole_str, frac_str = s.split("'")
         whole = int(whole_str)
         numerator, denominator = map(int, frac_str.split('/'))
-        return Fraction(whole * denominator + numerator, denominator)
+        numerator += whole * denominator
     elif '/' in s:
         # 处理真分数，如 3/5
         numerator, denominator = map(int, s.split('/'))
-        return Fraction(numerator, denominator)
     else:
         # 处理整数
-        return Fraction(int(s))
+        return int(s), 1
+    if denominator == 0:
+        raise ZeroDivisionError("分母为零")
+    return numerator, denominator
+
+def parse_number(s):
+    """
+    将字符串形式的数值解析为 Fraction 类型。
+    支持整数、真分数和带分数。
+    """
+    return Fraction(*parse_number_parts(s))
 
 def tokenize(expr_str):
     """
@@ -63,9 +82,125 @@ def tokenize(expr_str):
     tokens = re.findall(token_pattern, expr_str)
     return tokens
 
-def parse_expression_recursive(tokens):
+def rational_op(op, n1, d1, n2, d2):
+    """
+    整数分数运算核心：对 n1/d1 和 n2/d2（分母为正，不要求约分）做一次四则运算，返回未约分的 (分子, 分母)。
+    约分推迟到需要最终结果时再做一次，中间步骤不求最大公约数，也不创建 Fraction 对象。
+    除数为零时抛出 ZeroDivisionError。
+    """
+    if op == '+':
+        if d1 == d2:
+            return n1 + n2, d1
+        return n1 * d2 + n2 * d1, d1 * d2
+    elif op == '-':
+        if d1 == d2:
+            return n1 - n2, d1
+        return n1 * d2 - n2 * d1, d1 * d2
+    elif op == '*':
+        return n1 * n2, d1 * d2
+    else:
+        if n2 == 0:
+            raise ZeroDivisionError("除数为零")
+        if n2 < 0:
+            return -n1 * d2, -d1 * n2
+        return n1 * d2, d1 * n2
+
+# 运算符优先级，数值节点的优先级最高
+PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2}
+NUMBER_PRECEDENCE = 3
+
+class Number:
+    """
+    数值节点，value 为 Fraction，num 和 den 为其分子和分母。
+    """
+    __slots__ = ('value', 'num', 'den')
+    precedence = NUMBER_PRECEDENCE
+
+    def __init__(self, value):
+        self.value = value
+        self.num = value.numerator
+        self.den = value.denominator
+
+    @classmethod
+    def from_token(cls, token):
+        return cls(parse_number(token))
+
+    def render(self):
+        return number_to_string(self.value)
+
+    def canonical(self):
+        return self.render()
+
+    def canonical_digest(self, digest_size=16):
+        return hashlib.blake2b(b'n' + self.render().encode('ascii'), digest_size=digest_size).digest()
+
+class BinaryOp:
     """
-    使用递归下降解析器解析表达式，并返回计算结果。
+    二元运算节点，构造时用 rational_op 计算一次子树的值，以未约分的整数 num/den（den > 0）缓存；
+    value 在第一次访问时约分为 Fraction，与逐步用 Fraction 计算的结果完全相同。
+    除数为零时构造函数抛出 ZeroDivisionError。
+    """
+    __slots__ = ('op', 'left', 'right', 'num', 'den', '_value')
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+        self.num, self.den = rational_op(op, left.num, left.den, right.num, right.den)
+        self._value = None
+
+    @property
+    def value(self):
+        if self._value is None:
+            self._value = Fraction(self.num, self.den)
+        return self._value
+
+    @property
+    def precedence(self):
+        return PRECEDENCE[self.op]
+
+    def _needs_parentheses(self, child, is_right):
+        # 优先级更低的子树需要括号；右侧同优先级的子树也加括号，
+        # 这样渲染出的字符串再解析得到的树与原树完全相同
+        return child.precedence < self.precedence or (is_right and child.precedence == self.precedence)
+
+    def _operand(self, child, is_right, text):
+        return f"({text})" if self._needs_parentheses(child, is_right) else text
+
+    def render(self):
+        """
+        渲染为题目文件中的格式，如 1/2 + 3 * (4 - 1)，最外层不加括号。
+        """
+        left = self._operand(self.left, False, self.left.render())
+        right = self._operand(self.right, True, self.right.render())
+        return f"{left} {self.op} {right}"
+
+    def canonical(self):
+        """
+        规范形式，用于检测重复题目：两道题目能通过有限次交换 + 和 * 的左右操作数变成同一道题目时规范形式相同。
+        每个 + 和 * 节点的两个子树按规范形式排序，- 和 / 保持顺序；子树一律加括号，与其所在位置无关。
+        注意不做结合律展开：1 + 2 + 3 与 3 + 2 + 1 不是重复题目。
+        """
+        left = self.left.canonical()
+        right = self.right.canonical()
+        if self.op in ('+', '*') and left > right:
+            left, right = right, left
+        return f"({left}{self.op}{right})"
+
+    def canonical_digest(self, digest_size=16):
+        """
+        规范形式的定长哈希（digest_size 字节），与 canonical() 的判重结果相同，但不拼接字符串。
+        """
+        left = self.left.canonical_digest(digest_size)
+        right = self.right.canonical_digest(digest_size)
+        if self.op in ('+', '*') and left > right:
+            left, right = right, left
+        return hashlib.blake2b(self.op.encode('ascii') + left + right, digest_size=digest_size).digest()
+
+def parse_expression_tree(tokens, number=Number.from_token, binary_op=BinaryOp):
+    """
+    使用递归下降解析器把标记列表解析为表达式树，每个节点在构造时求值一次。
+    number（参数为数值标记）和 binary_op 为构造节点的函数，compile_expression 用它们按后缀顺序记录表达式而不建树。
     """
     def parse_expression():
         """
@@ -76,11 +211,7 @@ def parse_expression_recursive(tokens):
         while pos < len(tokens) and tokens[pos] in ('+', '-'):
             op = tokens[pos]
             pos += 1
-            term = parse_term()
-            if op == '+':
-                expr += term
-            elif op == '-':
-                expr -= term
+            expr = binary_op(op, expr, parse_term())
         return expr
 
     def parse_term():
@@ -92,13 +223,7 @@ def parse_expression_recursive(tokens):
         while pos < len(tokens) and tokens[pos] in ('*', '/'):
             op = tokens[pos]
             pos += 1
-            factor = parse_factor()
-            if op == '*':
-                term *= factor
-            elif op == '/':
-                if factor == 0:
-                    raise ZeroDivisionError("除数为零")
-                term /= factor
+            term = binary_op(op, term, parse_factor())
         return term
 
     def parse_factor():
@@ -116,183 +241,214 @@ def parse_expression_recursive(tokens):
             return expr
         else:
             pos += 1
-            return parse_number(token)
+            return number(token)
 
     pos = 0
     return parse_expression()
 
-def remove_outer_parentheses(expr):
+# 运算符和括号标记；其余标记都是数值
+SYNTAX_TOKENS = frozenset('+-*/()')
+
+def compile_skeleton(skeleton):
+    """
+    编译表达式骨架（数值标记替换为 'n' 的标记元组），返回 (形状, 参与运算的数值标记的下标列表)。
+    形状是由 'n'（数值）和运算符组成的后缀形式字符串；语法与 parse_expression_tree 完全相同，但不建树、不求值。
+    表达式能否解析、形状和叶子顺序只取决于骨架，无法解析时抛出与 parse_expression_tree 相同的异常。
+    """
+    shape = []
+    positions = []
+    markers = [i if token == 'n' else token for i, token in enumerate(skeleton)]
+
+    def number(marker):
+        if not isinstance(marker, int):
+            raise ValueError(f"无效的数值：{marker}")
+        shape.append('n')
+        positions.append(marker)
+
+    def binary_op(op, left, right):
+        shape.append(op)
+
+    parse_expression_tree(markers, number, binary_op)
+    return ''.join(shape), positions
+
+def compile_expression(tokens, skeletons=None):
     """
-    移除表达式最外层的括号（如果存在）。
+    把标记列表编译为后缀形式 (形状, 叶子列表)，叶子为未约分的 (分子, 分母)。
+    skeletons 为骨架到编译结果的缓存字典，同一骨架的表达式只用递归下降解析一次。
     """
-    while expr.startswith('(') and expr.endswith(')'):
-        # 检查括号是否匹配
-        count = 0
-        for i in range(len(expr)):
-            if expr[i] == '(':
-                count += 1
-            elif expr[i] == ')':
-                count -= 1
-            if count == 0 and i < len(expr) - 1:
-                break
+    skeleton = tuple(token if token in SYNTAX_TOKENS else 'n' for token in tokens)
+    compiled = skeletons.get(skeleton) if skeletons is not None else None
+    if compiled is None:
+        try:
+            compiled = compile_skeleton(skeleton)
+        except Exception as e:
+            compiled = e
+        if skeletons is not None:
+            skeletons[skeleton] = compiled
+    if isinstance(compiled, Exception):
+        # 清掉上次抛出时的调用栈，避免重复抛出同一个异常对象时调用栈越积越长
+        raise compiled.with_traceback(None)
+    shape, positions = compiled
+    return shape, [parse_number_parts(tokens[i]) for i in positions]
+
+def evaluate_postfix(shape, leaves):
+    """
+    用 rational_op 计算一个后缀形式表达式的值，返回 Fraction；除数为零时抛出 ZeroDivisionError。
+    """
+    stack = []
+    leaf_iter = iter(leaves)
+    for symbol in shape:
+        if symbol == 'n':
+            stack.append(next(leaf_iter))
         else:
-            # 如果整个表达式都在一对括号内，则移除
-            expr = expr[1:-1]
-            continue
-        break
-    return expr
+            n2, d2 = stack.pop()
+            n1, d1 = stack.pop()
+            stack.append(rational_op(symbol, n1, d1, n2, d2))
+    num, den = stack[0]
+    return Fraction(num, den)
 
-def canonical_form(expr_str):
+class CanonicalHashSet:
     """
-    生成表达式的规范形式，用于检测重复题目。
-    对于具备交换律的运算符（+ 和 *），操作数按升序排列。
-    对于不具备交换律的运算符（- 和 /），保持操作顺序。
+    存放规范形式哈希的紧凑集合：每个元素是 bits（64 或 128）位的哈希，
+    以开放寻址（线性探测）存放在 array('Q') 中，每个元素只占 8 或 16 字节（加上空槽），
+    而保存规范形式字符串的 set 每个元素要占一百多字节。
+    全零的槽表示空位，因此哈希的最低位被强制置 1，实际有效位数为 bits - 1；
+    槽位由其余的高位按槽数等比例映射得到，槽数不必是 2 的幂，按预计元素数建表时负载正好接近 MAX_LOAD。
+    默认 64 位：一千万道题目中出现误判重复的概率约为 10^-5，误判也只是多丢弃一道题目。
     """
-    tokens = tokenize(expr_str)
-    pos = 0
+    MAX_LOAD = 0.7
 
-    def parse_expression():
-        nonlocal pos
-        expr = parse_term()
-        while pos < len(tokens) and tokens[pos] in ('+', '-'):
-            op = tokens[pos]
-            pos += 1
-            right = parse_term()
-            if op in ('+'):
-                # 交换律：排序操作数
-                if expr > right:
-                    expr, right = right, expr
-            expr = f"{expr}{op}{right}"
-        return expr
+    def __init__(self, bits=64, capacity=1024):
+        if bits not in (64, 128):
+            raise ValueError("哈希位数只能是 64 或 128")
+        self.bits = bits
+        self.digest_size = bits // 8
+        self._words = bits // 64
+        self._capacity = max(2, math.ceil(capacity / self.MAX_LOAD))
+        self._slots = array('Q', bytes(8 * self._words * self._capacity))
+        self._size = 0
 
-    def parse_term():
-        nonlocal pos
-        term = parse_factor()
-        while pos < len(tokens) and tokens[pos] in ('*', '/'):
-            op = tokens[pos]
-            pos += 1
-            right = parse_factor()
-            if op in ('*'):
-                # 交换律：排序操作数
-                if term > right:
-                    term, right = right, term
-            term = f"{term}{op}{right}"
-        return term
+    def _key(self, digest):
+        words = [int.from_bytes(digest[i:i + 8], 'little') for i in range(0, self.digest_size, 8)]
+        words[0] |= 1
+        return words
 
-    def parse_factor():
-        nonlocal pos
-        token = tokens[pos]
-        if token == '(':
-            pos += 1
-            expr = parse_expression()
-            if pos >= len(tokens) or tokens[pos] != ')':
-                raise ValueError("缺少右括号")
-            pos += 1
-            return f"({expr})"
-        else:
-            pos += 1
-            return token
+    def _find(self, words):
+        """
+        返回 words 所在的槽位，不存在时返回应插入的空槽位。
+        """
+        capacity = self._capacity
+        # 最低位是空槽标记，用其余 63 位乘以槽数取高位作为起始槽位
+        slot = ((words[0] >> 1) * capacity) >> 63
+        slots = self._slots
+        width = self._words
+        while True:
+            base = slot * width
+            first = slots[base]
+            if first == 0:
+                return slot
+            if first == words[0] and (width == 1 or slots[base + 1] == words[1]):
+                return slot
+            slot += 1
+            if slot == capacity:
+                slot = 0
 
-    canonical = parse_expression()
-    return canonical
+    def _grow(self):
+        old_slots = self._slots
+        width = self._words
+        self._capacity *= 2
+        self._slots = array('Q', bytes(8 * width * self._capacity))
+        for base in range(0, len(old_slots), width):
+            if old_slots[base]:
+                words = old_slots[base:base + width].tolist()
+                slot = self._find(words)
+                self._slots[slot * width:slot * width + width] = array('Q', words)
+
+    def add(self, digest):
+        """
+        加入一个哈希（digest_size 字节），返回它原先是否不在集合中。
+        """
+        words = self._key(digest)
+        slot = self._find(words)
+        base = slot * self._words
+        if self._slots[base]:
+            return False
+        if (self._size + 1) > self._capacity * self.MAX_LOAD:
+            self._grow()
+            base = self._find(words) * self._words
+        self._slots[base:base + self._words] = array('Q', words)
+        self._size += 1
+        return True
 
-def generate_expression(min_operators, max_operators, range_limit, is_outermost=True):
+    def __contains__(self, digest):
+        return self._slots[self._find(self._key(digest)) * self._words] != 0
+
+    def __len__(self):
+        return self._size
+
+    def memory_bytes(self):
+        return self._slots.itemsize * len(self._slots)
+
+def generate_expression(min_operators, max_operators, range_limit, rng=random):
     """
-    递归生成随机的算术表达式，运算符个数在[min_operators, max_operators]之间。
-    仅在必要时添加括号，以确保运算顺序。
+    递归生成随机的表达式树，运算符个数在[min_operators, max_operators]之间。
+    每个子树只在构造时求值一次，减法和除法的重试直接比较子树缓存的值。
     """
     if max_operators == 0:
         # 如果没有可用的运算符数量，返回一个数值节点
-        value = generate_number(range_limit)
-        return number_to_string(value)
+        return Number(generate_number(range_limit, rng))
     else:
         if min_operators > 0:
             # 必须生成一个运算符节点
-            operator = random.choice(['+', '-', '*', '/'])
+            operator = rng.choice(['+', '-', '*', '/'])
             left_min = max(0, min_operators - 1)
             left_max = max_operators - 1
-            left_operators = random.randint(left_min, left_max)
+            left_operators = rng.randint(left_min, left_max)
             right_min = max(0, min_operators - 1 - left_operators)
             right_max = max_operators - 1 - left_operators
-            right_operators = random.randint(right_min, right_max)
+            right_operators = rng.randint(right_min, right_max)
         else:
             # 可以选择生成数值节点或运算符节点
-            if random.choice(['number', 'expression']) == 'number':
-                return number_to_string(generate_number(range_limit))
+            if rng.choice(['number', 'expression']) == 'number':
+                return Number(generate_number(range_limit, rng))
             else:
-                operator = random.choice(['+', '-', '*', '/'])
-                left_operators = random.randint(0, max_operators - 1)
+                operator = rng.choice(['+', '-', '*', '/'])
+                left_operators = rng.randint(0, max_operators - 1)
                 right_operators = max_operators - 1 - left_operators
 
-        if operator == '-':
-            # 对于减法，确保左操作数大于等于右操作数
-            attempts = 0
-            while True:
-                left_expr = generate_expression(left_operators, left_operators, range_limit, is_outermost=False)
-                right_expr = generate_expression(right_operators, right_operators, range_limit, is_outermost=False)
-                try:
-                    left_value = parse_expression_recursive(tokenize(left_expr))
-                    right_value = parse_expression_recursive(tokenize(right_expr))
-                    if left_value >= right_value:
-                        break
-                except ZeroDivisionError:
-                    pass  # 重试
-                attempts += 1
-                if attempts > 10:
-                    # 防止无限循环
-                    break
-        elif operator == '/':
-            # 对于除法，确保结果为真分数
-            attempts = 0
-            while True:
-                left_expr = generate_expression(left_operators, left_operators, range_limit, is_outermost=False)
-                right_expr = generate_expression(right_operators, right_operators, range_limit, is_outermost=False)
-                try:
-                    right_value = parse_expression_recursive(tokenize(right_expr))
-                    if right_value == 0:
-                        raise ZeroDivisionError
-                    result = parse_expression_recursive(tokenize(left_expr)) / right_value
-                    if 0 < abs(result) < 1:
-                        break
-                except ZeroDivisionError:
-                    pass  # 重试
-                attempts += 1
-                if attempts > 10:
-                    # 防止无限循环
-                    break
-        else:
+        if operator in ('+', '*'):
             # 对于加法和乘法，直接生成
-            left_expr = generate_expression(left_operators, left_operators, range_limit, is_outermost=False)
-            right_expr = generate_expression(right_operators, right_operators, range_limit, is_outermost=False)
-
-        # 根据运算符优先级决定是否添加括号
-        # 仅在需要改变默认运算顺序时添加括号
-        # 例如，生成 "5 + 3 * 2" 时，不需要括号，因为乘法优先
-        # 生成 "2 * (3 + 4)" 时，需要括号，以改变运算顺序
-        add_parentheses = False
-        if operator in ['+', '-']:
-            # 如果左右表达式包含 '*' 或 '/', 则需要为其添加括号
-            if re.search(r'[*/]', left_expr) or re.search(r'[*/]', right_expr):
-                add_parentheses = True
-        # 对于 '*' 和 '/', 一般不需要添加括号
-
-        if add_parentheses and not is_outermost:
-            expr = f"({left_expr} {operator} {right_expr})"
-        else:
-            expr = f"{left_expr} {operator} {right_expr}"
-        return expr
+            left = generate_expression(left_operators, left_operators, range_limit, rng)
+            right = generate_expression(right_operators, right_operators, range_limit, rng)
+            return BinaryOp(operator, left, right)
 
-def generate_valid_expression(min_operators, max_operators, range_limit):
+        # 对于减法，确保左操作数大于等于右操作数；对于除法，确保结果为真分数
+        for _ in range(11):
+            try:
+                left = generate_expression(left_operators, left_operators, range_limit, rng)
+                right = generate_expression(right_operators, right_operators, range_limit, rng)
+                if operator == '-':
+                    # 分母均为正，交叉相乘比较 left >= right
+                    if left.num * right.den >= right.num * left.den:
+                        return BinaryOp(operator, left, right)
+                else:
+                    node = BinaryOp(operator, left, right)
+                    if 0 < abs(node.num) < node.den:
+                        return node
+            except ZeroDivisionError:
+                pass  # 重试
+        # 防止无限循环，交给上层重新生成
+        raise ValueError("无法生成满足条件的子表达式")
+
+def generate_valid_expression(min_operators, max_operators, range_limit, rng=random):
     """
-    生成一个有效的算术表达式，确保计算结果非负且不产生除零错误，且运算符数量符合要求。
+    生成一个有效的表达式树，确保计算结果非负且不产生除零错误，且运算符数量符合要求。
     """
     attempts = 0
     while True:
-        expr = generate_expression(min_operators, max_operators, range_limit, is_outermost=True)
-        expr = remove_outer_parentheses(expr)  # 移除最外层括号
         try:
-            value = parse_expression_recursive(tokenize(expr))
-            if value < 0:
+            expr = generate_expression(min_operators, max_operators, range_limit, rng)
+            if expr.num < 0:
                 raise ValueError("结果为负数")
             return expr
         except (ZeroDivisionError, ValueError):
@@ -300,60 +456,464 @@ def generate_valid_expression(min_operators, max_operators, range_limit):
             if attempts > 100:
                 raise ValueError("无法生成有效的表达式")
 
-def generate_problems(n, range_limit):
+def generate_unique(n, range_limit, seen, rng=random):
     """
-    生成 n 道不重复的算术题目，数值范围在 [0, range_limit)，且每道题目至少包含一个运算符。
+    依次产生 n 道规范形式不在 seen（CanonicalHashSet）中的题目，返回 (规范形式哈希, 表达式树)。
     """
-    expressions = []
-    canonical_forms = set()
-    while len(expressions) < n:
+    count = 0
+    while count < n:
         try:
-            expr = generate_valid_expression(1, 3, range_limit)  # 最少1个运算符，最多3个运算符
-            canon = canonical_form(expr)
-            if canon not in canonical_forms:
-                canonical_forms.add(canon)
-                expressions.append(expr)
+            expr = generate_valid_expression(1, 3, range_limit, rng)  # 最少1个运算符，最多3个运算符
         except ValueError:
             continue  # 重试
-    return expressions
+        digest = expr.canonical_digest(seen.digest_size)
+        if seen.add(digest):
+            count += 1
+            yield digest, expr
+
+def value_key(node):
+    """
+    按值排序用的键：先比较浮点数，相等时再比较精确值，结果与直接比较 Fraction 相同但快得多。
+    """
+    value = node.value
+    return (float(value), value)
+
+class PairBlock:
+    """
+    由运算符 op 连接 lefts 和 rights 中的子表达式得到的一组题目，按下标随机访问，不实际展开。
+    kind 决定哪些组合是有效且互不重复的：
+    'all'：全部 (a, b) 组合；'unordered'：lefts 与 rights 相同时 a <= b 的组合（+ 和 * 交换后相同）；
+    'at_least'：值 a >= b 的组合（减法）；'below'：值 0 < a < b 的组合（除法结果为真分数）。
+    后两种要求 rights 按 value_key 排序，right_keys 为对应的键。
+    """
+
+    def __init__(self, op, lefts, rights, kind, right_keys=None):
+        self.op = op
+        self.lefts = lefts
+        self.rights = rights
+        self.kind = kind
+        self._prefix = None
+        if kind == 'all':
+            self.count = len(lefts) * len(rights)
+        elif kind == 'unordered':
+            self.count = len(lefts) * (len(lefts) + 1) // 2
+        else:
+            # 每个左操作数可搭配的右操作数在 rights 中是连续的一段，记录各段长度的前缀和
+            self._prefix = array('q', [0])
+            total = 0
+            for left in lefts:
+                position = bisect.bisect_right(right_keys, value_key(left))
+                if kind == 'at_least':
+                    total += position
+                elif left.num > 0:
+                    total += len(rights) - position
+                self._prefix.append(total)
+            self.count = total
+
+    def __getitem__(self, index):
+        if self.kind == 'all':
+            left, right = divmod(index, len(self.rights))
+        elif self.kind == 'unordered':
+            # 第 index 个 (left, right)，right 从 0 开始依次取 0..right
+            right = (math.isqrt(8 * index + 1) - 1) // 2
+            left = index - right * (right + 1) // 2
+        else:
+            left = bisect.bisect_right(self._prefix, index) - 1
+            offset = index - self._prefix[left]
+            if self.kind == 'at_least':
+                right = offset
+            else:
+                right = len(self.rights) - (self._prefix[left + 1] - self._prefix[left]) + offset
+        return BinaryOp(self.op, self.lefts[left], self.rights[right])
+
+# ExpressionSpace 最多展开的子表达式个数（每个约占 250 字节），超过时拒绝枚举
+ENUMERATION_MAX_NODES = 500000
+
+class ExpressionSpace:
+    """
+    数值范围为 [0, range_limit)、含 1 到 max_operators 个运算符的全部不重复题目（按规范形式去重），
+    与 generate_valid_expression 能生成的题目完全相同：减法被减数不小于减数，除法结果为真分数。
+    运算符少于 max_operators 的子表达式全部展开并按值排序，最高一层只计数、按下标构造，
+    因此 len() 是能生成的不重复题目的总数，space[i] 以 O(log) 的代价得到第 i 道题目。
+    range_limit 较小时才适用：展开的子表达式个数约为叶子数的 max_operators - 1 次方。
+    每一层展开前先由各块的计数得到该层的大小，累计超过 max_nodes 时抛出 ValueError，不会先耗尽时间和内存。
+    """
+
+    def __init__(self, range_limit, max_operators=3, max_nodes=ENUMERATION_MAX_NODES):
+        def check(count):
+            if count > max_nodes:
+                raise ValueError(f"数值范围 {range_limit} 过大：枚举需要展开超过 {max_nodes} 个子表达式，"
+                                 "请减小数值范围或改用随机生成。")
+
+        check(range_limit)
+        fractions = ((numerator, denominator)
+                     for denominator in range(2, range_limit)
+                     for numerator in range(1, denominator)
+                     if math.gcd(numerator, denominator) == 1)
+        # 数值范围很大时只数到超过上限为止
+        fractions = list(itertools.islice(fractions, max_nodes - range_limit + 1))
+        materialized = range_limit + len(fractions)
+        check(materialized)
+        leaves = [Number(Fraction(value)) for value in range(range_limit)]
+        leaves += [Number(Fraction(numerator, denominator)) for numerator, denominator in fractions]
+        levels = [sorted(leaves, key=value_key)]
+        keys = [[value_key(node) for node in levels[0]]]
+        self._blocks = []
+        for operators in range(1, max_operators + 1):
+            blocks = []
+            for op in ('+', '*', '-', '/'):
+                for left_operators in range(operators):
+                    right_operators = operators - 1 - left_operators
+                    lefts, rights = levels[left_operators], levels[right_operators]
+                    if op in ('+', '*'):
+                        if left_operators < right_operators:
+                            blocks.append(PairBlock(op, lefts, rights, 'all'))
+                        elif left_operators == right_operators:
+                            blocks.append(PairBlock(op, lefts, rights, 'unordered'))
+                    else:
+                        kind = 'at_least' if op == '-' else 'below'
+                        blocks.append(PairBlock(op, lefts, rights, kind, keys[right_operators]))
+            self._blocks.extend(block for block in blocks if block.count)
+            if operators < max_operators:
+                materialized += sum(block.count for block in blocks)
+                check(materialized)
+                level = sorted((block[i] for block in blocks for i in range(block.count)), key=value_key)
+                levels.append(level)
+                keys.append([value_key(node) for node in level])
+        self._offsets = list(itertools.accumulate((block.count for block in self._blocks), initial=0))
+
+    def __len__(self):
+        return self._offsets[-1]
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError("题目下标超出范围")
+        block = bisect.bisect_right(self._offsets, index) - 1
+        return self._blocks[block][index - self._offsets[block]]
+
+    def sample(self, n, rng=random):
+        """
+        不放回地随机抽取 n 道题目，依次产生表达式树；每道题目的代价与已抽取的比例无关。
+        n 超过 len(self) 时抛出 ValueError。
+        """
+        for index in rng.sample(range(len(self)), n):
+            yield self[index]
+
+def iter_enumerated_problem_texts(n, range_limit, seed=None, space=None):
+    """
+    从 ExpressionSpace 中不放回地抽取 n 道题目，依次产生 (题目, 答案)，不需要判重和重试。
+    n 超过能生成的不重复题目总数时立即抛出 ValueError。seed 为 None 时随机选取种子。
+    """
+    if space is None:
+        space = ExpressionSpace(range_limit)
+    if n > len(space):
+        raise ValueError(f"数值范围 {range_limit} 内最多只能生成 {len(space)} 道不重复的题目。")
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 63)
+    for expr in space.sample(n, chunk_rng(seed, 0)):
+        yield expr.render(), number_to_string(expr.value)
+
+# 并行生成时每个任务生成的题目数；任务划分与进程数无关，因此输出只取决于种子
+CHUNK_SIZE = 1000
+
+def chunk_rng(seed, task):
+    """
+    第 task 个任务的随机数生成器，由 (seed, task) 唯一确定，各任务的随机序列互相独立。
+    """
+    return random.Random(hashlib.sha256(f"{seed}:{task}".encode('ascii')).digest())
+
+def generate_chunk(seed, task, size, range_limit, hash_bits=64):
+    """
+    生成第 task 块题目（块内不重复），返回 [(规范形式哈希, 题目, 答案)]，可在工作进程中执行。
+    """
+    seen = CanonicalHashSet(hash_bits, capacity=size)
+    rng = chunk_rng(seed, task)
+    return [(digest, expr.render(), number_to_string(expr.value))
+            for digest, expr in generate_unique(size, range_limit, seen, rng)]
+
+def ordered_map(func, arg_tuples, workers=1, initializer=None, initargs=()):
+    """
+    按顺序依次产生 func(*args) 的结果；workers 大于 1 时在进程池中计算，
+    每个进程最多有两个任务在排队，arg_tuples 可以是无限的迭代器。
+    initializer 在每个工作进程中执行一次（workers 为 1 时在当前进程中执行）。
+    """
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for args in arg_tuples:
+            yield func(*args)
+        return
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+    try:
+        pending = collections.deque()
+        for args in arg_tuples:
+            pending.append(pool.submit(func, *args))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+def iter_chunks(seed, size, range_limit, hash_bits=64, workers=1):
+    """
+    按任务编号顺序依次产生各块题目；workers 大于 1 时用进程池提前计算后续的块。
+    """
+    tasks = ((seed, task, size, range_limit, hash_bits) for task in itertools.count())
+    return ordered_map(generate_chunk, tasks, workers)
+
+def iter_problem_texts(n, range_limit, seed=None, workers=1, hash_bits=64):
+    """
+    流式生成 n 道不重复的题目，每生成一道就产生一个 (题目, 答案)，答案在生成时计算一次。
+    题目按块生成，每块使用由 (seed, 块编号) 确定的随机数生成器，各块按编号顺序合并，
+    重复的题目只保留第一次出现的；同一种子在任意进程数下都得到相同的结果。
+    除判重用的哈希集合外，内存中只有正在合并和排队中的几个块。
+    seed 为 None 时随机选取种子。
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 63)
+    workers = workers or os.cpu_count() or 1
+    seen = CanonicalHashSet(hash_bits, capacity=n)
+    count = 0
+    chunks = iter_chunks(seed, min(n, CHUNK_SIZE), range_limit, hash_bits, workers)
+    try:
+        for chunk in chunks:
+            for digest, exercise, answer in chunk:
+                if seen.add(digest):
+                    yield exercise, answer
+                    count += 1
+                    if count == n:
+                        return
+    finally:
+        chunks.close()
+
+# 写出题目和答案时每批拼接的行数
+WRITE_BATCH = 10000
+
+def write_problems(problems, exercise_file='Exercises.txt', answer_file='Answers.txt', batch_size=WRITE_BATCH):
+    """
+    把 (题目, 答案) 流写入题目文件和答案文件：每 batch_size 道题拼成一个字符串写一次，
+    两个文件同步推进，内存中最多只有一批。返回写出的题目数。
+    """
+    count = 0
+    with open(exercise_file, 'w', encoding='utf-8', buffering=1 << 20) as f_ex, \
+            open(answer_file, 'w', encoding='utf-8', buffering=1 << 20) as f_ans:
+        exercise_lines = []
+        answer_lines = []
+        for count, (exercise, answer) in enumerate(problems, 1):
+            exercise_lines.append(f"{count}. {exercise} =\n")  # 题目，添加编号
+            answer_lines.append(f"{count}. {answer}\n")  # 答案，添加编号
+            if len(exercise_lines) >= batch_size:
+                f_ex.write(''.join(exercise_lines))
+                f_ans.write(''.join(answer_lines))
+                exercise_lines.clear()
+                answer_lines.clear()
+        f_ex.write(''.join(exercise_lines))
+        f_ans.write(''.join(answer_lines))
+    return count
+
+def exercise_expression(ex_line):
+    """
+    去掉题目文件中一行的编号和等号，返回表达式字符串。
+    """
+    ex_expr = ex_line.strip()
+    if ex_expr.endswith('='):
+        ex_expr = ex_expr[:-1]
+    # 去掉编号
+    if '.' in ex_expr:
+        ex_expr = ex_expr.split('.', 1)[1].strip()
+    return ex_expr
+
+def answer_value(ans_line):
+    """
+    解析答案文件中的一行（去掉编号），无法解析时抛出异常。
+    """
+    ans_str = ans_line.strip()
+    # 去掉编号
+    if '.' in ans_str:
+        ans_str = ans_str.split('.', 1)[1].strip()
+    return parse_number(ans_str)
 
-def grade(exercise_file, answer_file):
+def answer_matches(value, ans_line):
+    """
+    判断答案是否等于题目的值；题目无法求值（value 为 None）或答案无法解析时视为错误。
+    """
+    if value is None:
+        return False
+    try:
+        return answer_value(ans_line) == value
+    except Exception:
+        return False
+
+def grade_lines(start, exercise_lines, answer_lines):
+    """
+    批改一块题目，start 为第一道题的题号，返回 (正确题号列表, 错误题号列表)，可在工作进程中执行。
+    """
+    correct = []
+    wrong = []
+    values = evaluate_lines(exercise_lines)
+    for idx, (value, ans_line) in enumerate(zip(values, answer_lines), start):
+        if answer_matches(value, ans_line):
+            correct.append(idx)
+        else:
+            wrong.append(idx)
+    return correct, wrong
+
+def count_lines(file_path):
+    """
+    按字节块统计文件行数（与 readlines() 的行数相同），不把文件读入内存。
+    """
+    count = 0
+    last = b'\n'
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            count += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        # 最后一行没有换行符
+        count += 1
+    return count
+
+# 批改时每块包含的题目数
+GRADE_CHUNK = 20000
+
+def iter_line_chunks(exercise_file, answer_file, chunk_size=GRADE_CHUNK):
+    """
+    同步逐行读取题目文件和答案文件，每 chunk_size 行产生一个 (起始题号, 题目行, 答案行)。
+    """
+    with open(exercise_file, 'r', encoding='utf-8') as f_ex, open(answer_file, 'r', encoding='utf-8') as f_ans:
+        start = 1
+        while True:
+            exercise_lines = list(itertools.islice(f_ex, chunk_size))
+            answer_lines = list(itertools.islice(f_ans, chunk_size))
+            if not exercise_lines:
+                return
+            yield start, exercise_lines, answer_lines
+            start += len(exercise_lines)
+
+def write_grade(grade_file, id_chunks):
+    """
+    按顺序合并各块的 (正确题号列表, 错误题号列表)，写出批改结果文件，返回 (正确数, 错误数)。
+    结果文件中题数写在题号之前，题号先暂存在临时文件中，内存占用与题目数无关。
+    """
+    counts = {'correct': 0, 'wrong': 0}
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as correct_ids, \
+            tempfile.TemporaryFile('w+', encoding='utf-8') as wrong_ids:
+        id_files = {'correct': correct_ids, 'wrong': wrong_ids}
+        for correct, wrong in id_chunks:
+            for name, ids in (('correct', correct), ('wrong', wrong)):
+                if ids:
+                    separator = ', ' if counts[name] else ''
+                    id_files[name].write(separator + ', '.join(map(str, ids)))
+                    counts[name] += len(ids)
+        with open(grade_file, 'w', encoding='utf-8') as f_grade:
+            for label, name in (('Correct', 'correct'), ('Wrong', 'wrong')):
+                f_grade.write(f"{label}: {counts[name]} (")
+                id_files[name].seek(0)
+                for block in iter(lambda: id_files[name].read(1 << 20), ''):
+                    f_grade.write(block)
+                f_grade.write(")\n")
+    return counts['correct'], counts['wrong']
+
+def grade(exercise_file, answer_file, grade_file='Grade.txt', workers=1, chunk_size=GRADE_CHUNK):
     """
     批改答案，生成批改结果文件。
+    两个文件按块同步流式读取，各块交给进程池批改（workers 为 0 时使用全部 CPU 核心），结果按顺序合并。
     """
-    with open(exercise_file, 'r', encoding='utf-8') as f_ex:
-        exercises = f_ex.readlines()
-    with open(answer_file, 'r', encoding='utf-8') as f_ans:
-        answers = f_ans.readlines()
-    if len(exercises) != len(answers):
+    if count_lines(exercise_file) != count_lines(answer_file):
         print("题目数与答案数不一致。")
         sys.exit(1)
-    correct = []
-    wrong = []
-    for idx, (ex_line, ans_line) in enumerate(zip(exercises, answers), 1):
+    workers = workers or os.cpu_count() or 1
+    chunks = iter_line_chunks(exercise_file, answer_file, chunk_size)
+    write_grade(grade_file, ordered_map(grade_lines, chunks, workers))
+
+def evaluate_lines(exercise_lines):
+    """
+    对一块题目求值，无法解析的题目记为 None（任何答案都判为错误），可在工作进程中执行。
+    题目编译为后缀形式（同一骨架只解析一次）后用整数分数运算求值，结果与对解析树求值完全相同。
+    """
+    values = []
+    skeletons = {}
+    for ex_line in exercise_lines:
         try:
-            # 去掉编号和等号
-            ex_expr = ex_line.strip()
-            if ex_expr.endswith('='):
-                ex_expr = ex_expr[:-1]
-            # 去掉编号
-            if '.' in ex_expr:
-                ex_expr = ex_expr.split('.', 1)[1].strip()
-            ans_str = ans_line.strip()
-            # 去掉编号
-            if '.' in ans_str:
-                ans_str = ans_str.split('.', 1)[1].strip()
-            expr_value = parse_expression_recursive(tokenize(ex_expr))
-            user_answer = parse_number(ans_str)
-            if expr_value == user_answer:
-                correct.append(idx)
+            values.append(evaluate_postfix(*compile_expression(tokenize(exercise_expression(ex_line)), skeletons)))
+        except Exception:
+            values.append(None)
+    return values
+
+def evaluate_exercises(exercise_file, workers=1, chunk_size=GRADE_CHUNK):
+    """
+    解析并求值题目文件中的全部题目，返回按题号排列的值表。
+    """
+    def chunks(f_ex):
+        while True:
+            exercise_lines = list(itertools.islice(f_ex, chunk_size))
+            if not exercise_lines:
+                return
+            yield (exercise_lines,)
+
+    values = []
+    with open(exercise_file, 'r', encoding='utf-8') as f_ex:
+        for chunk_values in ordered_map(evaluate_lines, chunks(f_ex), workers):
+            values.extend(chunk_values)
+    return values
+
+# 工作进程中的题目值表，由 _init_grader 设置
+_exercise_values = None
+
+def _init_grader(values):
+    # 值表随 initargs 传给每个工作进程一次，不随每个任务重复传递
+    global _exercise_values
+    _exercise_values = values
+
+def grade_answer_file(answer_file, grade_file, chunk_size=GRADE_CHUNK):
+    """
+    用值表批改一个答案文件并写出批改结果文件，可在工作进程中执行。
+    返回 (正确数, 错误数)；答案数与题目数不一致时不写结果文件，返回 None。
+    """
+    values = _exercise_values
+    if count_lines(answer_file) != len(values):
+        return None
+
+    def id_chunks(f_ans):
+        for start in range(0, len(values), chunk_size):
+            correct = []
+            wrong = []
+            for idx, ans_line in enumerate(itertools.islice(f_ans, chunk_size), start):
+                (correct if answer_matches(values[idx], ans_line) else wrong).append(idx + 1)
+            yield correct, wrong
+
+    with open(answer_file, 'r', encoding='utf-8') as f_ans:
+        return write_grade(grade_file, id_chunks(f_ans))
+
+def batch_grade(exercise_file, answer_dir, grade_dir='Grades', workers=1):
+    """
+    用同一份题目批改目录中的全部答案文件（忽略以 . 开头的文件）。
+    题目只解析、求值一次，各答案文件在进程池中并行批改；
+    每个答案文件生成 <完整文件名>_Grade.txt（保留扩展名，alice.txt 与 alice.csv 的结果不会互相覆盖），
+    汇总写入 grade_dir/Summary.txt。
+    """
+    if not os.path.isdir(answer_dir):
+        # 在解析题目之前检查，避免白白求值全部题目
+        print(f"答案目录不存在：{answer_dir}")
+        sys.exit(1)
+    workers = workers or os.cpu_count() or 1
+    values = evaluate_exercises(exercise_file, workers)
+    names = sorted(name for name in os.listdir(answer_dir)
+                   if not name.startswith('.') and os.path.isfile(os.path.join(answer_dir, name)))
+    os.makedirs(grade_dir, exist_ok=True)
+    tasks = ((os.path.join(answer_dir, name), os.path.join(grade_dir, name + '_Grade.txt'))
+             for name in names)
+    results = ordered_map(grade_answer_file, tasks, min(workers, len(names) or 1), _init_grader, (values,))
+    summary_file = os.path.join(grade_dir, 'Summary.txt')
+    with open(summary_file, 'w', encoding='utf-8') as f_summary:
+        f_summary.write(f"Exercises: {len(values)}\n")
+        for name, result in zip(names, results):
+            if result is None:
+                f_summary.write(f"{name}: 题目数与答案数不一致。\n")
             else:
-                wrong.append(idx)
-        except Exception as e:
-            wrong.append(idx)
-    with open('Grade.txt', 'w', encoding='utf-8') as f_grade:
-        f_grade.write(f"Correct: {len(correct)} ({', '.join(map(str, correct))})\n")
-        f_grade.write(f"Wrong: {len(wrong)} ({', '.join(map(str, wrong))})\n")
+                f_summary.write(f"{name}: Correct {result[0]}, Wrong {result[1]}\n")
+    print(f"已批改 {len(names)} 个答案文件，结果保存在 {grade_dir}")
 
 def main():
     """
@@ -364,6 +924,13 @@ def main():
     parser.add_argument('-r', type=int, help='数值范围（不包括该数）')
     parser.add_argument('-e', type=str, help='题目文件')
     parser.add_argument('-a', type=str, help='答案文件')
+    parser.add_argument('--answer-dir', type=str, help='答案文件目录，与 -e 一起使用时批量批改目录中的全部答案文件')
+    parser.add_argument('--grade-dir', type=str, default='Grades', help='批量批改的结果目录（默认 Grades）')
+    parser.add_argument('--seed', type=int, help='随机种子，相同的种子总是生成相同的题目（与进程数无关）')
+    parser.add_argument('--workers', type=int, default=1, help='生成题目或批改答案的进程数（默认 1，0 表示使用全部 CPU 核心）')
+    parser.add_argument('--enumerate', action='store_true',
+                        help='枚举全部不重复题目后不放回抽样，适用于较小的数值范围（约 10 以内）；'
+                             '数值范围过大或题目数超过上限时立即报错')
     args = parser.parse_args()
 
     if args.n is not None and args.r is not None:
@@ -374,18 +941,26 @@ def main():
         if args.r <= 1:
             print("数值范围应大于1。")
             sys.exit(1)
-        expressions = generate_problems(args.n, args.r)
-        with open('Exercises.txt', 'w', encoding='utf-8') as f_ex:
-            for idx, expr in enumerate(expressions, 1):
-                f_ex.write(f"{idx}. {expr} =\n")  # 写入题目，添加编号
-        with open('Answers.txt', 'w', encoding='utf-8') as f_ans:
-            for idx, expr in enumerate(expressions, 1):
-                value = parse_expression_recursive(tokenize(expr))
-                ans_str = number_to_string(value)
-                f_ans.write(f"{idx}. {ans_str}\n")  # 写入答案，添加编号
+        if args.enumerate:
+            try:
+                space = ExpressionSpace(args.r)
+            except ValueError as e:
+                print(e)
+                sys.exit(1)
+            if args.n > len(space):
+                print(f"数值范围 {args.r} 内最多只能生成 {len(space)} 道不重复的题目。")
+                sys.exit(1)
+            problems = iter_enumerated_problem_texts(args.n, args.r, args.seed, space)
+        else:
+            problems = iter_problem_texts(args.n, args.r, args.seed, args.workers)
+        # 边生成边写出，答案在生成时已求值，无需重新解析
+        write_problems(problems)
     elif args.e is not None and args.a is not None:
         # 批改答案模式
-        grade(args.e, args.a)
+        grade(args.e, args.a, workers=args.workers)
+    elif args.e is not None and args.answer_dir is not None:
+        # 批量批改模式
+        batch_grade(args.e, args.answer_dir, args.grade_dir, args.workers)
     else:
         # 参数不足，打印帮助信息
         parser.print_help()
@@ -0,0 +1,50 @@
+import sys
+import os
+import unittest
+
+# 获取当前文件夹和父目录路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+# 将父目录添加到 sys.path
+sys.path.insert(0, parent_dir)
+
+from main import preprocess_text, create_vectorizer  # 导入被测试的函数
+from all_pairs import all_pairs_similarity, cluster_pairs
+
+TEXTS = [preprocess_text(text) for text in [
+    "今天是星期天，天气晴，今天晚上我要去看电影。",
+    "数据结构与算法是计算机科学的基础。",
+    "今天是周天，天气晴朗，我晚上要去看电影。",
+    "数据结构与算法是计算机科学的重要基础。",
+    "我昨天在图书馆借了三本小说。",
+    "今天是星期天，天气晴，今天晚上我要去看电影。",
+]]
+
+
+class TestAllPairs(unittest.TestCase):
+    def test_blocks_match_brute_force(self):
+        tfidf_matrix = create_vectorizer().fit_transform(TEXTS)
+        similarity_matrix = (tfidf_matrix @ tfidf_matrix.T).toarray()
+        expected = {(i, j) for i in range(len(TEXTS)) for j in range(i + 1, len(TEXTS))
+                    if similarity_matrix[i][j] >= 0.5}
+        for block_size in (1, 2, 100):
+            pairs, _ = all_pairs_similarity(TEXTS, threshold=0.5, top_k=0, block_size=block_size)
+            self.assertEqual({(i, j) for i, j, _ in pairs}, expected)
+            for i, j, score in pairs:
+                self.assertAlmostEqual(score, similarity_matrix[i][j], places=10)
+
+    def test_top_k_limits_neighbours(self):
+        pairs, _ = all_pairs_similarity(TEXTS, threshold=0.0, top_k=1)
+        # 每篇文档只贡献一个近邻，去重后对数不超过文档数
+        self.assertLessEqual(len(pairs), len(TEXTS))
+
+    def test_clusters(self):
+        _, clusters = all_pairs_similarity(TEXTS, threshold=0.4)
+        self.assertEqual(clusters, [[0, 2, 5], [1, 3]])
+
+    def test_cluster_pairs_union(self):
+        self.assertEqual(cluster_pairs([(0, 1, 0.9), (2, 3, 0.8), (1, 4, 0.7)]), [[0, 1, 4], [2, 3]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+
+# 获取当前文件夹和父目录路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+# 将父目录添加到 sys.path
+sys.path.insert(0, parent_dir)
+
+import corpus_index
+from corpus_index import CorpusIndex  # 导入被测试的类
+from main import read_file, preprocess_text
+from sklearn.metrics.pairwise import cosine_similarity
+
+DOCS = [
+    "今天是星期天，天气晴，今天晚上我要去看电影。",
+    "数据结构与算法是计算机科学的基础。",
+    "今天天气不错，我想去公园散步。",
+]
+
+
+def fixture_paragraphs():
+    """
+    以 Performance_Analyze 下各篇样例文本的段落作为参考语料，共数百篇短文档
+    """
+    fixture_dir = os.path.join(parent_dir, 'Performance_Analyze')
+    paragraphs = []
+    for name in sorted(os.listdir(fixture_dir)):
+        if name.startswith('orig') and name.endswith('.txt'):
+            text = read_file(os.path.join(fixture_dir, name))
+            paragraphs.extend(preprocess_text(p) for p in text.split('\n') if len(p.strip()) > 20)
+    return paragraphs
+
+
+class TestCorpusIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index_dir = os.path.join(self.tmp.name, 'index')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_query_indexed_document(self):
+        index = CorpusIndex.build(self.index_dir, DOCS, ['a', 'b', 'c'])
+        scores = index.query([DOCS[1]])
+        self.assertEqual(scores.shape, (1, 3))
+        self.assertAlmostEqual(scores[0][1], 1.0, places=6)
+        self.assertLess(scores[0][0], 0.1)
+
+    def test_reopen_matches_built_index(self):
+        built = CorpusIndex.build(self.index_dir, DOCS, ['a', 'b', 'c'])
+        reopened = CorpusIndex(self.index_dir)
+        self.assertEqual(reopened.doc_ids, ['a', 'b', 'c'])
+        self.assertEqual((built.matrix != reopened.matrix).nnz, 0)
+
+    def test_append_without_rebuild(self):
+        index = CorpusIndex.build(self.index_dir, DOCS[:2], ['a', 'b'])
+        before = index.query([DOCS[0]])
+        index.append([DOCS[0]], ['a-copy'])
+
+        reopened = CorpusIndex(self.index_dir)
+        self.assertEqual(reopened.n_docs, 3)
+        after = reopened.query([DOCS[0]])
+        # 追加不改变词汇表和 IDF，已有文档的得分保持不变
+        self.assertEqual(list(after[0][:2]), list(before[0]))
+        self.assertAlmostEqual(after[0][2], 1.0, places=6)
+
+    def test_interrupted_append_is_discarded(self):
+        index = CorpusIndex.build(self.index_dir, DOCS[:2], ['a', 'b'])
+        # 模拟追加数据写到一半就中断：数据文件有多余内容，但 meta.json 未更新
+        with open(os.path.join(self.index_dir, 'data.bin'), 'ab') as f:
+            f.write(b'\x00' * 24)
+        index.append([DOCS[2]], ['c'])
+        reopened = CorpusIndex(self.index_dir)
+        self.assertEqual(reopened.n_docs, 3)
+        self.assertAlmostEqual(reopened.query([DOCS[1]])[0][1], 1.0, places=6)
+
+    def test_doc_ids_beyond_meta_are_discarded(self):
+        index = CorpusIndex.build(self.index_dir, DOCS[:2], ['a', 'b'])
+        # 模拟 docs.jsonl 已替换但 meta.json 未更新时中断：多出的编号不属于索引
+        with open(os.path.join(self.index_dir, 'docs.jsonl'), 'a', encoding='utf-8') as f:
+            f.write('"lost"\n')
+        reopened = CorpusIndex(self.index_dir)
+        self.assertEqual(reopened.doc_ids, ['a', 'b'])
+        reopened.append([DOCS[2]], ['c'])
+        self.assertEqual(CorpusIndex(self.index_dir).doc_ids, ['a', 'b', 'c'])
+        self.assertFalse(os.path.exists(os.path.join(self.index_dir, 'docs.jsonl.tmp')))
+
+    def test_search_matches_brute_force(self):
+        docs = fixture_paragraphs()
+        index = CorpusIndex.build(self.index_dir, docs, list(range(len(docs))))
+        touched = total = 0
+        for query in docs[::40]:
+            brute = index.query([query])[0]
+            reference = cosine_similarity(index.matrix, index.vectorizer.transform([query])).ravel()
+            for k, threshold in ((5, 0.0), (1, 0.0), (None, 0.3), (10, 0.2)):
+                results, stats = index.search(query, k, threshold)
+                expected = sorted(((i, score) for i, score in enumerate(brute.tolist()) if score >= threshold),
+                                  key=lambda item: (-item[1], item[0]))
+                self.assertEqual(results, expected[:k] if k else expected)
+                for doc, score in results:
+                    self.assertAlmostEqual(score, reference[doc], places=12)
+                touched += stats['postings_touched']
+                total += stats['query_postings']
+        # 剪枝后访问的倒排项应明显少于查询词的全部倒排项
+        self.assertLess(touched, total * 0.8)
+
+    def test_search_requires_bound(self):
+        index = CorpusIndex.build(self.index_dir, DOCS, ['a', 'b', 'c'])
+        with self.assertRaises(ValueError):
+            index.search(DOCS[0], k=None, threshold=0.0)
+        results, _ = index.search(DOCS[0], k=None, threshold=0.99)
+        self.assertEqual([doc for doc, _ in results], [0])
+
+    def test_search_after_append(self):
+        index = CorpusIndex.build(self.index_dir, DOCS[:2], ['a', 'b'])
+        index.search(DOCS[0], k=2)
+        index.append([DOCS[0]], ['a-copy'])
+        # 同一实例追加后，倒排表和词项上界也要包含新文档
+        results, _ = index.search(DOCS[0], k=2)
+        self.assertEqual(sorted(doc for doc, _ in results), [0, 2])
+        self.assertAlmostEqual(dict(results)[2], 1.0, places=6)
+
+    def test_search_fills_zero_scores_like_brute_force(self):
+        index = CorpusIndex.build(self.index_dir, DOCS, ['a', 'b', 'c'])
+        query = "计算机科学"
+        brute = index.query([query])[0]
+        expected = sorted(enumerate(brute.tolist()), key=lambda item: (-item[1], item[0]))
+        results, _ = index.search(query, k=3)
+        # 只有文档 1 与查询有公共词，其余文档按下标以 0 分补足
+        self.assertEqual(results[1:], [(0, 0.0), (2, 0.0)])
+        self.assertEqual([doc for doc, _ in results], [doc for doc, _ in expected])
+
+    def assertPostingsMatchMatrix(self, index):
+        expected = index.matrix.tocsc()
+        expected.sort_indices()
+        postings = index.postings
+        self.assertEqual(list(postings.indptr), list(expected.indptr))
+        self.assertEqual(list(postings.indices), list(expected.indices))
+        self.assertEqual(list(postings.data), list(expected.data))
+        self.assertEqual(list(index.term_max), list(expected.max(axis=0).toarray().ravel()))
+
+    def test_postings_are_stored_and_merged(self):
+        docs = fixture_paragraphs()
+        saved = corpus_index.MERGE_BLOCK
+        # 很小的合并块，确保合并跨越多个块
+        corpus_index.MERGE_BLOCK = 50
+        try:
+            index = CorpusIndex.build(self.index_dir, docs[:100], list(range(100)))
+            self.assertPostingsMatchMatrix(index)
+            index.append(docs[100:150], list(range(100, 150)))
+            index.append(docs[150:160], list(range(150, 160)))
+        finally:
+            corpus_index.MERGE_BLOCK = saved
+        self.assertPostingsMatchMatrix(index)
+        reopened = CorpusIndex(self.index_dir)
+        # 打开时直接映射磁盘上的倒排表，不在内存中转置
+        self.assertIsNotNone(reopened._postings)
+        self.assertIsNone(reopened._matrix)
+        self.assertPostingsMatchMatrix(reopened)
+        # 只保留当前一代的倒排表文件
+        postings_files = sorted(name for name in os.listdir(self.index_dir) if name.startswith(('postings', 'term_max')))
+        self.assertEqual(postings_files, sorted(name.format(160) for name in corpus_index.POSTINGS_FILES))
+
+    def test_index_without_postings_files(self):
+        # 旧版本的索引没有倒排表文件：search 在内存中转置，追加时补写倒排表文件
+        index = CorpusIndex.build(self.index_dir, DOCS[:2], ['a', 'b'])
+        meta = dict(index.meta)
+        del meta['postings']
+        CorpusIndex._write_meta(self.index_dir, meta)
+        for name in corpus_index.POSTINGS_FILES:
+            os.remove(os.path.join(self.index_dir, name.format(2)))
+        legacy = CorpusIndex(self.index_dir)
+        self.assertEqual([doc for doc, _ in legacy.search(DOCS[1], k=1)[0]], [1])
+        legacy.append([DOCS[2]], ['c'])
+        with open(os.path.join(self.index_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['postings'], 3)
+        self.assertPostingsMatchMatrix(CorpusIndex(self.index_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
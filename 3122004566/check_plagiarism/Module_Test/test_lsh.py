@@ -0,0 +1,59 @@
+import sys
+import os
+import unittest
+
+# 获取当前文件夹和父目录路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+# 将父目录添加到 sys.path
+sys.path.insert(0, parent_dir)
+
+from main import tokenize_text, preprocess_text, batch_similarity  # 导入被测试的函数
+from lsh import MinHashLSH, lsh_batch_similarity, measure_recall
+
+ORIGS = [preprocess_text(text) for text in [
+    "今天是星期天，天气晴，今天晚上我要去看电影。",
+    "数据结构与算法是计算机科学的基础。",
+]]
+SUSPECTS = [preprocess_text(text) for text in [
+    "今天是周天，天气晴朗，我晚上要去看电影。",
+    "数据结构与算法是计算机科学的基础。",
+]]
+
+
+class TestMinHashLSH(unittest.TestCase):
+    def test_identical_document_is_candidate(self):
+        index = MinHashLSH()
+        for doc_id, text in enumerate(ORIGS):
+            index.add(doc_id, tokenize_text(text))
+        self.assertEqual(len(index), 2)
+        self.assertIn(1, index.query(tokenize_text(ORIGS[1])))
+
+    def test_unrelated_document_is_pruned(self):
+        index = MinHashLSH()
+        index.add(0, tokenize_text(ORIGS[1]))
+        self.assertEqual(index.query(tokenize_text(preprocess_text("今天天气不错，我想去公园散步。"))), set())
+
+    def test_candidate_scores_match_brute_force(self):
+        similarity_matrix = batch_similarity(ORIGS, SUSPECTS)
+        pairs = lsh_batch_similarity(ORIGS, SUSPECTS)
+        self.assertIn((1, 1), {(i, j) for i, j, _ in pairs})
+        for i, j, similarity in pairs:
+            self.assertAlmostEqual(similarity, similarity_matrix[i][j], places=10)
+
+    def test_measure_recall(self):
+        result = measure_recall(ORIGS, SUSPECTS, 0.5)
+        self.assertEqual(result['relevant'], 2)
+        self.assertEqual(result['recall'], 1.0)
+
+    def test_measure_recall_excludes_self_pairs(self):
+        texts = ORIGS + SUSPECTS
+        with_self = measure_recall(texts, texts, 0.5)
+        result = measure_recall(texts, texts, 0.5, exclude_self=True)
+        # 每篇文本与自身的得分为 1，不计入时相关对恰好少 len(texts) 个
+        self.assertEqual(with_self['relevant'] - result['relevant'], len(texts))
+        self.assertEqual(with_self['found'] - result['found'], len(texts))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,6 +10,13 @@ sys.path.insert(0, parent_dir)
 
 from main import cosine_similarity_between_texts  # 导入被测试的函数
 from main import read_file
+from main import batch_similarity, collect_files, run_batch
+from main import split_paragraphs, tokenize_text, tokenize_texts, cosine_similarity_between_tokens
+from main import SimilarityModel, cosine_similarity_async, create_similarity_executor
+from main import cosine_similarity_between_char_ngrams
+import main
+import json
+import tempfile
 
 class TestPlagiarismDetection(unittest.TestCase):
     def test_identical_texts(self):
@@ -62,5 +69,159 @@ class TestPlagiarismDetection(unittest.TestCase):
         with self.assertRaises(AttributeError):
             cosine_similarity_between_texts(text1, text2)
 
+    def test_batch_similarity_shape_and_scores(self):
+        origs = ["今天是星期天，天气晴，今天晚上我要去看电影。", "数据结构与算法是计算机科学的基础。"]
+        suspects = ["今天是星期天，天气晴，今天晚上我要去看电影。", "今天天气不错，我想去公园散步。", ""]
+        scores = batch_similarity(origs, suspects)
+        self.assertEqual(scores.shape, (3, 2))
+        self.assertAlmostEqual(scores[0][0], 1.0, places=2)
+        self.assertLess(scores[0][1], 0.1)
+        self.assertEqual(scores[2][0], 0.0)
+
+    def test_batch_manifest_and_output(self):
+        import tempfile
+        import csv
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, text in [('a.txt', "今天天气不错，我想去公园散步。"), ('b.txt', "数据结构与算法是计算机科学的基础。")]:
+                with open(os.path.join(tmp, name), 'w', encoding='utf-8') as f:
+                    f.write(text)
+            manifest = os.path.join(tmp, 'manifest.txt')
+            with open(manifest, 'w', encoding='utf-8') as f:
+                f.write("# 原文清单\na.txt\n\nb.txt\n")
+            self.assertEqual(collect_files(manifest), [os.path.join(tmp, 'a.txt'), os.path.join(tmp, 'b.txt')])
+
+            output = os.path.join(tmp, 'result.csv')
+            run_batch(manifest, tmp, output)
+            with open(output, encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+            # 目录中包含 a.txt、b.txt、manifest.txt 三个文件，对比两篇原文
+            self.assertEqual(len(rows), 6)
+
+    def test_split_paragraphs_keeps_tokens(self):
+        text = "今天是星期天\n天气晴\r\n今天晚上我要去看电影\n\n数据结构与算法是计算机科学的基础"
+        chunks = split_paragraphs(text, chunk_size=8)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(''.join(chunks), text)
+        self.assertEqual([t for chunk in chunks for t in tokenize_text(chunk)], tokenize_text(text))
+
+    def test_parallel_tokenization_matches_serial(self):
+        texts = ["今天是星期天 天气晴\n今天晚上我要去看电影\n" * 20, "", "数据结构与算法是计算机科学的基础"]
+        self.assertEqual(tokenize_texts(texts, workers=2, chunk_size=16), tokenize_texts(texts, workers=1))
+
+    def test_similarity_between_tokens_matches_texts(self):
+        text1 = "今天是星期天，天气晴，今天晚上我要去看电影。"
+        text2 = "今天是周天，天气晴朗，我晚上要去看电影。"
+        self.assertAlmostEqual(cosine_similarity_between_tokens(tokenize_text(text1), tokenize_text(text2)),
+                               cosine_similarity_between_texts(text1, text2), places=12)
+
+    def test_concurrent_calls_match_serial(self):
+        from concurrent.futures import ThreadPoolExecutor
+        pairs = [("今天是星期天，天气晴，今天晚上我要去看电影。", "今天是周天，天气晴朗，我晚上要去看电影。"),
+                 ("今天天气不错，我想去公园散步。", "数据结构与算法是计算机科学的基础。")] * 4
+        expected = [cosine_similarity_between_texts(a, b) for a, b in pairs]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda pair: cosine_similarity_between_texts(*pair), pairs))
+        self.assertEqual(results, expected)
+
+    def test_async_wrapper(self):
+        import asyncio
+        text1 = "今天是星期天，天气晴，今天晚上我要去看电影。"
+        text2 = "今天是周天，天气晴朗，我晚上要去看电影。"
+        expected = cosine_similarity_between_texts(text1, text2)
+
+        async def run(executor):
+            return await asyncio.gather(*(cosine_similarity_async(text1, text2, executor) for _ in range(3)))
+
+        self.assertEqual(asyncio.run(run(None)), [expected] * 3)
+        with create_similarity_executor(2) as executor:
+            for similarity in asyncio.run(run(executor)):
+                self.assertAlmostEqual(similarity, expected, places=12)
+
+    def test_similarity_model_is_read_only(self):
+        corpus = ["今天是星期天，天气晴，今天晚上我要去看电影。", "数据结构与算法是计算机科学的基础。",
+                  "今天天气不错，我想去公园散步。"]
+        model = SimilarityModel.fit(corpus)
+        vocabulary = dict(model.vectorizer.vocabulary_)
+        self.assertAlmostEqual(model.similarity(corpus[0], corpus[0]), 1.0, places=6)
+        self.assertLess(model.similarity(corpus[0], corpus[1]), 0.1)
+        self.assertEqual(model.vectorizer.vocabulary_, vocabulary)
+
+    def test_char_ngram_mode(self):
+        text1 = "今天是星期天 天气晴 今天晚上我要去看电影"
+        text2 = "今天是周天 天气晴朗 我晚上要去看电影"
+        text3 = "数据结构与算法是计算机科学的基础"
+        for n in (2, 3):
+            self.assertAlmostEqual(cosine_similarity_between_char_ngrams(text1, text1, n), 1.0, places=6)
+            self.assertGreater(cosine_similarity_between_char_ngrams(text1, text2, n),
+                               cosine_similarity_between_char_ngrams(text1, text3, n))
+        # 只有两篇文本时批量模式与单对模式的 IDF 相同
+        matrix = batch_similarity([text1], [text2], char_ngram=2)
+        self.assertAlmostEqual(matrix[0][0], cosine_similarity_between_char_ngrams(text1, text2, 2), places=12)
+
+    def test_char_ngram_rejects_lsh(self):
+        with self.assertRaises(SystemExit):
+            main.main(['a', 'b', 'c', '--batch', '--lsh', '--char-ngram', '2'])
+
+    def test_lsh_requires_batch(self):
+        for options in (['--lsh'], ['--lsh-bands', '32'], ['--stream', '--lsh'], ['--batch', '--lsh-rows', '3']):
+            with self.assertRaises(SystemExit):
+                main.main(['a', 'b', 'c'] + options)
+
+    def test_batch_and_stream_are_exclusive(self):
+        with self.assertRaises(SystemExit):
+            main.main(['a', 'b', 'c', '--batch', '--stream'])
+
+    def test_stream_rejects_workers_and_token_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = os.path.join(tmp, 'tokens.db')
+            for options in (['--workers', '2'], ['--token-cache', cache_path]):
+                with self.assertRaises(SystemExit):
+                    main.main(['a', 'b', 'c', '--stream'] + options)
+            # 参数检查在打开缓存之前，不会留下缓存文件
+            self.assertFalse(os.path.exists(cache_path))
+
+    def test_report_rejects_batch_and_stream(self):
+        for mode in ('--batch', '--stream'):
+            with self.assertRaises(SystemExit):
+                main.main(['a', 'b', 'c', mode, '--report', 'report.json'])
+
+    def test_result_cache_rejects_batch_and_stream(self):
+        for mode in ('--batch', '--stream'):
+            with self.assertRaises(SystemExit):
+                main.main(['a', 'b', 'c', mode, '--result-cache', 'results.db'])
+
+    def test_metrics_jsonl(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'metrics.jsonl')
+            main.enable_metrics(path)
+            try:
+                cosine_similarity_between_texts("今天天气不错，我想去公园散步。", "今天天气很好，我想去公园跑步。")
+                main.flush_metrics()
+                main.flush_metrics()
+            finally:
+                main.metrics = None
+            with open(path, 'r', encoding='utf-8') as f:
+                snapshots = [json.loads(line) for line in f]
+        self.assertEqual(len(snapshots), 2)
+        stages = snapshots[-1]['stages']
+        self.assertEqual(stages['tokenize']['calls'], 2)
+        self.assertEqual(stages['vectorize']['tokens'], stages['tokenize']['tokens'])
+        self.assertEqual(stages['cosine']['pairs'], 1)
+        self.assertGreater(snapshots[-1]['gauges']['vocabulary_size'], 0)
+
+    def test_metrics_prometheus(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'metrics.prom')
+            main.enable_metrics(path)
+            try:
+                main.preprocess_text("今天，天气不错。")
+                main.flush_metrics()
+            finally:
+                main.metrics = None
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        self.assertIn('check_plagiarism_stage_calls_total{stage="preprocess"} 1', content)
+        self.assertIn('check_plagiarism_stage_chars_total{stage="preprocess"} 8', content)
+
 if __name__ == '__main__':
     unittest.main()
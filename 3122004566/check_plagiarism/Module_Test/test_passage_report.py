@@ -0,0 +1,51 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+
+# 获取当前文件夹和父目录路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+# 将父目录添加到 sys.path
+sys.path.insert(0, parent_dir)
+
+from passage_report import split_sentences, match_passages, write_report  # 导入被测试的函数
+
+ORIG = ("数据结构与算法是计算机科学的基础，学习它们需要大量的练习。\n"
+        "今天是星期天，天气晴，今天晚上我要去看电影。\n"
+        "操作系统负责管理计算机的硬件资源，并为应用程序提供服务。\n")
+SUSPECT = ("我昨天在图书馆借了三本小说。\n"
+           "操作系统负责管理计算机的硬件资源，并为所有应用程序提供服务。\n")
+
+
+class TestPassageReport(unittest.TestCase):
+    def test_split_sentences_offsets(self):
+        text = "  第一句。第二句！\n\n第三句"
+        spans = split_sentences(text)
+        self.assertEqual([text[start:end] for start, end in spans], ["第一句。", "第二句！", "第三句"])
+
+    def test_locates_copied_passage(self):
+        passages = match_passages(ORIG, SUSPECT)
+        self.assertEqual(len(passages), 1)
+        passage = passages[0]
+        self.assertTrue(passage['orig']['text'].startswith("操作系统"))
+        self.assertEqual(ORIG[passage['orig']['start']:passage['orig']['end']], passage['orig']['text'])
+        self.assertEqual(SUSPECT[passage['suspect']['start']:passage['suspect']['end']], passage['suspect']['text'])
+        self.assertGreater(passage['score'], 0.2)
+
+    def test_unrelated_texts(self):
+        self.assertEqual(match_passages(ORIG, "我昨天在图书馆借了三本小说。"), [])
+
+    def test_write_report(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'report.json')
+            write_report(path, 'orig.txt', 'suspect.txt', ORIG, SUSPECT, 0.5)
+            with open(path, encoding='utf-8') as f:
+                report = json.load(f)
+        self.assertEqual(report['similarity'], 0.5)
+        self.assertEqual(len(report['passages']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import sys
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+# 获取当前文件夹和父目录路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+# 将父目录添加到 sys.path
+sys.path.insert(0, parent_dir)
+
+import main  # 导入被测试的函数
+from main import preprocess_text, similarity_fingerprint
+from result_cache import ResultCache
+
+
+def _fill_cache(path, worker_id):
+    cache = ResultCache(path, similarity_fingerprint())
+    for i in range(50):
+        cache.put(f"原文{worker_id}-{i}", f"疑似{i}", i / 100)
+    cache.close()
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'results.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip_is_order_independent(self):
+        cache = ResultCache(self.path, similarity_fingerprint())
+        self.assertIsNone(cache.get("今天天气不错", "今天天气很好"))
+        cache.put("今天天气不错", "今天天气很好", 0.75)
+        self.assertEqual(cache.get("今天天气不错", "今天天气很好"), 0.75)
+        self.assertEqual(cache.get("今天天气很好", "今天天气不错"), 0.75)
+        cache.close()
+
+    def test_config_change_misses(self):
+        cache = ResultCache(self.path, similarity_fingerprint())
+        cache.put("计算机", "科学", 0.1)
+        cache.close()
+        other = ResultCache(self.path, similarity_fingerprint() + 'changed')
+        self.assertIsNone(other.get("计算机", "科学"))
+        other.close()
+
+    def test_eviction(self):
+        cache = ResultCache(self.path, similarity_fingerprint(), max_entries=5)
+        for i in range(20):
+            cache.put(f"文本{i}", "原文", i / 20)
+        self.assertEqual(len(cache), 5)
+        self.assertIsNotNone(cache.get("文本19", "原文"))
+        self.assertIsNone(cache.get("文本0", "原文"))
+        cache.close()
+
+    def test_concurrent_processes(self):
+        with ProcessPoolExecutor(max_workers=3) as pool:
+            list(pool.map(_fill_cache, [self.path] * 3, range(3)))
+        cache = ResultCache(self.path, similarity_fingerprint())
+        self.assertEqual(len(cache), 150)
+        self.assertEqual(cache.get("原文2-49", "疑似49"), 0.49)
+        cache.close()
+
+    def test_cli_hit_skips_computation(self):
+        orig_path = os.path.join(self.tmp.name, 'orig.txt')
+        suspect_path = os.path.join(self.tmp.name, 'suspect.txt')
+        output_path = os.path.join(self.tmp.name, 'output.txt')
+        with open(orig_path, 'w', encoding='utf-8') as f:
+            f.write("今天是星期天，天气晴，今天晚上我要去看电影。")
+        with open(suspect_path, 'w', encoding='utf-8') as f:
+            f.write("今天是周天，天气晴朗，我晚上要去看电影。")
+
+        main.main([orig_path, suspect_path, output_path, '--result-cache', self.path])
+        with open(output_path, 'r', encoding='utf-8') as f:
+            computed = f.read()
+
+        # 把缓存中的结果改成一个不可能算出的值，再次运行应直接返回它
+        cache = ResultCache(self.path, similarity_fingerprint())
+        with open(orig_path, 'r', encoding='utf-8') as f1, open(suspect_path, 'r', encoding='utf-8') as f2:
+            orig_text, suspect_text = preprocess_text(f1.read()), preprocess_text(f2.read())
+        self.assertEqual(f"{cache.get(orig_text, suspect_text):.2f}", computed)
+        cache.put(orig_text, suspect_text, 0.123)
+        cache.close()
+
+        main.main([orig_path, suspect_path, output_path, '--result-cache', self.path])
+        with open(output_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), "0.12")
+
+
+if __name__ == '__main__':
+    unittest.main()
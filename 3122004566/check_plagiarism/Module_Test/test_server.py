@@ -0,0 +1,59 @@
+import sys
+import os
+import tempfile
+import threading
+import unittest
+
+# 获取当前文件夹和父目录路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+# 将父目录添加到 sys.path
+sys.path.insert(0, parent_dir)
+
+from main import preprocess_text, cosine_similarity_between_texts  # 导入被测试的函数
+from server import UnixSimilarityServer, SimilarityRequestHandler
+from client import request_similarity
+
+
+class TestSimilarityServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp.name, 'server.sock')
+        self.server = UnixSimilarityServer(self.socket_path, SimilarityRequestHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def test_matches_cli_similarity(self):
+        text1 = "今天是星期天，天气晴，今天晚上我要去看电影。"
+        text2 = "今天是周天，天气晴朗，我晚上要去看电影。"
+        expected = cosine_similarity_between_texts(preprocess_text(text1), preprocess_text(text2))
+        similarity = request_similarity(text1, text2, self.socket_path)
+        self.assertAlmostEqual(similarity, expected, places=10)
+
+    def test_concurrent_requests(self):
+        results = []
+
+        def worker():
+            results.append(request_similarity("数据结构与算法", "数据结构与算法", self.socket_path))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), 4)
+        for similarity in results:
+            self.assertAlmostEqual(similarity, 1.0, places=6)
+
+    def test_error_response(self):
+        with self.assertRaises(RuntimeError):
+            request_similarity(None, "正常文本", self.socket_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
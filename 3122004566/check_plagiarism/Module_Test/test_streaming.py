@@ -0,0 +1,60 @@
+import sys
+import os
+import tempfile
+import unittest
+
+# 获取当前文件夹和父目录路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+# 将父目录添加到 sys.path
+sys.path.insert(0, parent_dir)
+
+from main import preprocess_text, tokenize_text, cosine_similarity_between_texts  # 导入被测试的函数
+from streaming import iter_text_chunks, stream_similarity
+
+TEXT1 = "今天是星期天，天气晴，今天晚上我要去看电影。\n数据结构与算法是计算机科学的基础。\n" * 30
+TEXT2 = "今天是周天，天气晴朗，我晚上要去看电影。\n算法是计算机科学的基础。\n" * 30
+
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_chunks_preserve_tokens(self):
+        path = self.write('a.txt', TEXT1)
+        chunks = list(iter_text_chunks(path, chunk_size=100))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(''.join(chunks), TEXT1)
+        chunk_tokens = [t for chunk in chunks for t in tokenize_text(preprocess_text(chunk))]
+        self.assertEqual(chunk_tokens, tokenize_text(preprocess_text(TEXT1)))
+
+    def test_long_line_is_split(self):
+        path = self.write('long.txt', "天气 " * 500)
+        chunks = list(iter_text_chunks(path, chunk_size=100))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) <= 300 for chunk in chunks))
+
+    def test_matches_exact_similarity(self):
+        path1 = self.write('a.txt', TEXT1)
+        path2 = self.write('b.txt', TEXT2)
+        expected = cosine_similarity_between_texts(preprocess_text(TEXT1), preprocess_text(TEXT2))
+        self.assertAlmostEqual(stream_similarity(path1, path2, chunk_size=128), expected, places=6)
+
+    def test_empty_file(self):
+        path1 = self.write('empty.txt', '')
+        path2 = self.write('b.txt', TEXT2)
+        with self.assertRaises(ValueError):
+            stream_similarity(path1, path2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import sys
+import os
+import tempfile
+import unittest
+
+# 获取当前文件夹和父目录路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+# 将父目录添加到 sys.path
+sys.path.insert(0, parent_dir)
+
+from main import tokenize_text, tokenize_texts, tokenizer_fingerprint  # 导入被测试的函数
+from token_cache import TokenCache
+
+
+class TestTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'tokens.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip(self):
+        cache = TokenCache(self.path, tokenizer_fingerprint())
+        text = "今天是星期天 天气晴 今天晚上我要去看电影"
+        self.assertEqual(cache.get_many([text]), [None])
+        first = tokenize_texts([text], cache=cache)
+        self.assertEqual(first, [tokenize_text(text)])
+        self.assertEqual(cache.get_many([text]), first)
+        cache.close()
+
+    def test_hit_skips_segmentation(self):
+        cache = TokenCache(self.path, tokenizer_fingerprint())
+        # 预先放入与真实分词不同的结果，命中时应原样返回而不重新分词
+        cache.put_many(["数据结构与算法"], [["假", "结果"]])
+        self.assertEqual(tokenize_texts(["数据结构与算法", "计算机"], cache=cache),
+                         [["假", "结果"], tokenize_text("计算机")])
+        self.assertEqual(len(cache), 2)
+        cache.close()
+
+    def test_config_change_misses(self):
+        cache = TokenCache(self.path, tokenizer_fingerprint())
+        cache.put_many(["计算机科学"], [["计算机", "科学"]])
+        cache.close()
+        other = TokenCache(self.path, tokenizer_fingerprint() + 'changed')
+        self.assertEqual(other.get_many(["计算机科学"]), [None])
+        other.close()
+
+    def test_size_bounded_eviction(self):
+        cache = TokenCache(self.path, tokenizer_fingerprint(), max_bytes=200)
+        for i in range(20):
+            cache.put_many([f"文本{i}"], [[f"词{i}"] * 10])
+        self.assertLessEqual(cache.total_bytes(), 200)
+        # 最近写入的条目保留，最早的被淘汰
+        self.assertIsNotNone(cache.get_many(["文本19"])[0])
+        self.assertIsNone(cache.get_many(["文本0"])[0])
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
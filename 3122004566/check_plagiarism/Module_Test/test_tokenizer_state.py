@@ -0,0 +1,73 @@
+import sys
+import os
+import pickle
+import tempfile
+import unittest
+import multiprocessing
+
+# 获取当前文件夹和父目录路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+# 将父目录添加到 sys.path
+sys.path.insert(0, parent_dir)
+
+import main  # 导入被测试的函数
+from tokenizer_state import save_state, load_state
+
+
+class TestTokenizerState(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'tokenizer.state')
+        self.stop_words = main.stop_words
+
+    def tearDown(self):
+        main.tokenizer_state_digest = None
+        main.tokenizer_state_path = None
+        main.stop_words = self.stop_words
+        main.stop_word_set = frozenset(self.stop_words)
+        self.tmp.cleanup()
+
+    def test_roundtrip_keeps_tokenization(self):
+        text = "今天是星期天 天气晴 今天晚上我要去看电影"
+        expected = main.tokenize_text(text)
+        fingerprint = main.tokenizer_fingerprint()
+        digest = save_state(self.path, main.stop_words)
+
+        main.load_tokenizer_state(self.path)
+        self.assertEqual(main.tokenizer_state_digest, digest)
+        self.assertEqual(main.tokenize_text(text), expected)
+        # 加载状态后分词配置指纹随之改变，分词缓存不会混用
+        self.assertNotEqual(main.tokenizer_fingerprint(), fingerprint)
+
+    def test_stop_words_restored(self):
+        save_state(self.path, main.stop_words + ['天气'])
+        digest, stop_words = load_state(self.path)
+        self.assertIn('天气', stop_words)
+        self.assertEqual(len(digest), 64)
+
+    def test_spawned_workers_load_state(self):
+        # spawn 启动的工作进程不继承父进程的分词状态，必须由 initializer 重新加载
+        save_state(self.path, main.stop_words + ['电影'])
+        main.load_tokenizer_state(self.path)
+        texts = ["今天是星期天 天气晴\n今天晚上我要去看电影\n" * 3, "数据结构与算法是计算机科学的基础"]
+        serial = main.tokenize_texts(texts, workers=1)
+        self.assertNotIn('电影', serial[0])
+        parallel = main.tokenize_texts(texts, workers=2, chunk_size=16, mp_context=multiprocessing.get_context('spawn'))
+        self.assertEqual(parallel, serial)
+
+    def test_version_mismatch(self):
+        save_state(self.path, main.stop_words)
+        with open(self.path, 'rb') as f:
+            header = pickle.load(f)
+            payload = f.read()
+        header['jieba'] = '0.0'
+        with open(self.path, 'wb') as f:
+            pickle.dump(header, f)
+            f.write(payload)
+        with self.assertRaises(ValueError):
+            load_state(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import sys
+import os
+import json
+import time
+import tempfile
+import threading
+import unittest
+
+# 获取当前文件夹和父目录路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+# 将父目录添加到 sys.path
+sys.path.insert(0, parent_dir)
+
+from main import preprocess_text, cosine_similarity_between_texts  # 导入被测试的函数
+from watcher import InboxPipeline
+
+ORIG = "今天是星期天，天气晴，今天晚上我要去看电影。"
+SUSPECTS = {
+    'a.txt': "今天是周天，天气晴朗，我晚上要去看电影。",
+    'b.txt': "数据结构与算法是计算机科学的基础。",
+}
+
+
+def write(path, content):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def read_lines(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+class TestInboxPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.inbox = os.path.join(self.tmp.name, 'inbox')
+        os.makedirs(self.inbox)
+        self.orig_path = os.path.join(self.tmp.name, 'orig.txt')
+        write(self.orig_path, ORIG)
+        self.results = os.path.join(self.tmp.name, 'results.jsonl')
+        self.errors = os.path.join(self.tmp.name, 'errors.jsonl')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def pipeline(self, **options):
+        return InboxPipeline(self.inbox, [self.orig_path], self.results, self.errors, workers=1, queue_size=2,
+                             poll_interval=0.1, **options)
+
+    def test_drains_existing_files(self):
+        for name, content in SUSPECTS.items():
+            write(os.path.join(self.inbox, name), content)
+        write(os.path.join(self.inbox, 'empty.txt'), '')
+        write(os.path.join(self.inbox, '.uploading'), ORIG)
+
+        processed, failed = self.pipeline().run(once=True)
+        self.assertEqual((processed, failed), (2, 1))
+
+        scores = {os.path.basename(r['suspect']): r['similarity'] for r in read_lines(self.results)}
+        for name, content in SUSPECTS.items():
+            expected = cosine_similarity_between_texts(preprocess_text(ORIG), preprocess_text(content))
+            self.assertEqual(scores[name], round(expected, 2))
+        errors = read_lines(self.errors)
+        self.assertEqual(os.path.basename(errors[0]['suspect']), 'empty.txt')
+
+        self.assertEqual(sorted(os.listdir(os.path.join(self.inbox, 'processed'))), sorted(SUSPECTS))
+        self.assertEqual(os.listdir(os.path.join(self.inbox, 'failed')), ['empty.txt'])
+        # 以 . 开头的文件视为上传中，留在收件目录
+        self.assertIn('.uploading', os.listdir(self.inbox))
+
+    def test_resubmission_keeps_earlier_file(self):
+        for content in (SUSPECTS['a.txt'], SUSPECTS['b.txt']):
+            write(os.path.join(self.inbox, 'a.txt'), content)
+            self.assertEqual(self.pipeline().run(once=True), (1, 0))
+
+        records = read_lines(self.results)
+        self.assertEqual([os.path.basename(r['suspect']) for r in records], ['a.txt', 'a.1.txt'])
+        # 每条记录指向的文件内容就是当时打分的那次提交
+        for record, content in zip(records, (SUSPECTS['a.txt'], SUSPECTS['b.txt'])):
+            with open(record['suspect'], 'r', encoding='utf-8') as f:
+                self.assertEqual(f.read(), content)
+
+    def watch_new_file(self, use_inotify):
+        pipeline = self.pipeline(use_inotify=use_inotify)
+        thread = threading.Thread(target=pipeline.run)
+        thread.start()
+        try:
+            # 先写临时文件再改名，模拟上传完成
+            tmp_path = os.path.join(self.inbox, '.a.txt')
+            write(tmp_path, SUSPECTS['a.txt'])
+            os.replace(tmp_path, os.path.join(self.inbox, 'a.txt'))
+            deadline = time.time() + 30
+            while not read_lines(self.results) and time.time() < deadline:
+                time.sleep(0.1)
+        finally:
+            pipeline.stop()
+            thread.join()
+        self.assertEqual(len(read_lines(self.results)), 1)
+        self.assertEqual(pipeline.processed, 1)
+
+    def test_watch_inotify(self):
+        self.watch_new_file(use_inotify=True)
+
+    def test_watch_polling(self):
+        self.watch_new_file(use_inotify=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
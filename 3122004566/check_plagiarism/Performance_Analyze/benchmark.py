@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+
+# 将 check_plagiarism 目录加入 sys.path，以便子进程导入主程序模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(current_dir))
+
+STAGES = ['read', 'preprocess', 'tokenize', 'vectorize', 'cosine']
+DEFAULT_SIZES = [1, 4, 16]
+# 结果默认写到系统临时目录，运行基准不会在源码目录留下文件；基线文件才需要提交
+DEFAULT_RESULTS = os.path.join(tempfile.gettempdir(), 'check_plagiarism_benchmark_results.json')
+DEFAULT_BASELINE = os.path.join(current_dir, 'benchmark_baseline.json')
+# 基线耗时低于该值的阶段受计时抖动影响大，不参与比较
+MIN_COMPARE_SECONDS = 0.01
+
+
+def build_corpus(scale, out_dir, seed=0):
+    """
+    由 orig*.txt 生成约为原文 scale 倍大小的一对文档
+    原文由 orig.txt 的段落重复 scale 次并打乱得到，疑似文本从各个 orig_0.8_*.txt 中取对应数量的段落
+    """
+    rng = random.Random(seed)
+
+    def paragraphs(name):
+        with open(os.path.join(current_dir, name), 'r', encoding='utf-8') as f:
+            return [p for p in f.read().split('\n') if p.strip()]
+
+    orig = paragraphs('orig.txt')
+    variants = [paragraphs(name) for name in sorted(os.listdir(current_dir)) if name.startswith('orig_0.8_')]
+
+    orig_paragraphs = orig * scale
+    rng.shuffle(orig_paragraphs)
+    suspect_paragraphs = []
+    for _ in range(scale):
+        variant = rng.choice(variants)
+        suspect_paragraphs.extend(variant)
+    rng.shuffle(suspect_paragraphs)
+
+    paths = []
+    for name, content in (('orig.txt', orig_paragraphs), ('suspect.txt', suspect_paragraphs)):
+        path = os.path.join(out_dir, f'{scale}x_{name}')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(content))
+        paths.append(path)
+    return paths
+
+
+def run_stages(orig_path, suspect_path, repeat):
+    """
+    在当前进程中分阶段计时，每个阶段重复 repeat 次取最短时间
+    """
+    import jieba
+    from main import read_file, preprocess_text, tokenize_texts, create_vectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    # 词典加载属于冷启动开销，不计入各阶段
+    jieba.initialize()
+
+    def timed(func):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            value = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return value, best
+
+    timings = {}
+    raw, timings['read'] = timed(lambda: [read_file(orig_path), read_file(suspect_path)])
+    texts, timings['preprocess'] = timed(lambda: [preprocess_text(text) for text in raw])
+    tokens, timings['tokenize'] = timed(lambda: tokenize_texts(texts))
+    matrix, timings['vectorize'] = timed(lambda: create_vectorizer(pretokenized=True).fit_transform(tokens))
+    similarity, timings['cosine'] = timed(lambda: cosine_similarity(matrix[0:1], matrix[1:2])[0][0])
+
+    size = sum(len(text.encode('utf-8')) for text in raw)
+    return {
+        'bytes': size,
+        'tokens': sum(len(t) for t in tokens),
+        'vocabulary': matrix.shape[1],
+        'similarity': round(float(similarity), 4),
+        'stages': {
+            stage: {'seconds': round(timings[stage], 6),
+                    'mb_per_s': round(size / 1e6 / timings[stage], 3) if timings[stage] > 0 else None}
+            for stage in STAGES
+        },
+        # Linux 上 ru_maxrss 的单位为 KB
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def run_size(scale, repeat, work_dir):
+    """
+    在独立子进程中测量一个规模，保证峰值 RSS 互不影响
+    """
+    orig_path, suspect_path = build_corpus(scale, work_dir)
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', orig_path, suspect_path, '--repeat', str(repeat)],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True, text=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['scale'] = scale
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """
+    与基线比较各阶段耗时和峰值 RSS，返回超出容差的回归项列表
+    """
+    regressions = []
+    baseline_by_scale = {entry['scale']: entry for entry in baseline['results']}
+    for entry in results['results']:
+        base = baseline_by_scale.get(entry['scale'])
+        if base is None:
+            continue
+        for stage in STAGES:
+            now = entry['stages'][stage]['seconds']
+            before = base['stages'][stage]['seconds']
+            if before >= MIN_COMPARE_SECONDS and now > before * (1 + tolerance):
+                regressions.append(f"{entry['scale']}x {stage}: {before:.4f}s -> {now:.4f}s (+{now / before - 1:.0%})")
+        now_rss, before_rss = entry['peak_rss_kb'], base['peak_rss_kb']
+        if now_rss > before_rss * (1 + tolerance):
+            regressions.append(f"{entry['scale']}x peak_rss: {before_rss}KB -> {now_rss}KB (+{now_rss / before_rss - 1:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查重流程基准测试：分阶段计时、记录峰值内存并与基线比较")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='语料规模（orig.txt 的倍数，默认 1 4 16）')
+    parser.add_argument('--repeat', type=int, default=3, help='每个阶段重复次数，取最短时间（默认 3）')
+    parser.add_argument('--output', default=DEFAULT_RESULTS, help='结果文件路径（JSON，默认写到系统临时目录）')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线文件路径（JSON）')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='允许的相对退化比例（默认 0.25 即 25%%）')
+    parser.add_argument('--update-baseline', action='store_true', help='用本次结果覆盖基线')
+    parser.add_argument('--child', nargs=2, metavar=('ORIG', 'SUSPECT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_stages(args.child[0], args.child[1], args.repeat)))
+        return
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        entries = []
+        for scale in args.sizes:
+            entry = run_size(scale, args.repeat, work_dir)
+            entries.append(entry)
+            stages = ', '.join(f"{stage} {entry['stages'][stage]['seconds']:.4f}s" for stage in STAGES)
+            print(f"{scale}x ({entry['bytes'] / 1024:.0f} KB): {stages}, 峰值 RSS {entry['peak_rss_kb'] / 1024:.1f} MB")
+
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': args.repeat,
+        'results': entries,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"结果已保存到 {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"基线已更新: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("未找到基线文件，跳过比较（可使用 --update-baseline 生成）")
+        return
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("发现性能退化：")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("未发现超出容差的性能退化")
+
+
+if __name__ == '__main__':
+    main()
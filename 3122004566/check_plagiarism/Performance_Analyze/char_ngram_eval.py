@@ -0,0 +1,68 @@
+import os
+import sys
+import glob
+import time
+
+# 将 check_plagiarism 目录加入 sys.path，以便导入主程序模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(current_dir))
+
+import jieba  # noqa: E402
+from main import (read_file, preprocess_text, cosine_similarity_between_texts,  # noqa: E402
+                  cosine_similarity_between_char_ngrams)
+
+# 待评估的字符 n-gram 长度
+NGRAM_SIZES = [2, 3]
+
+
+def best_time(func, repeat):
+    """
+    重复 repeat 次取最短时间，返回 (结果, 秒)
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return value, best
+
+
+def main():
+    """
+    在 orig_0.8_*.txt 上比较字符 n-gram 快速模式与 Jieba 分词模式的得分偏差和加速比
+    计时包含分词（或切 n-gram）、拟合和 Cosine 计算，不含读文件、预处理和 Jieba 词典加载
+    用法: python char_ngram_eval.py [重复次数，默认 3]
+    """
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    jieba.initialize()
+    orig_text = preprocess_text(read_file(os.path.join(current_dir, 'orig.txt')))
+    suspect_paths = sorted(glob.glob(os.path.join(current_dir, 'orig_0.8_*.txt')))
+
+    header = f"{'fixture':<22}{'jieba':>8}"
+    for n in NGRAM_SIZES:
+        header += f"{f'char{n}':>8}{'diff':>8}{'speedup':>9}"
+    print(header)
+
+    deviations = {n: [] for n in NGRAM_SIZES}
+    speedups = {n: [] for n in NGRAM_SIZES}
+    for path in suspect_paths:
+        suspect_text = preprocess_text(read_file(path))
+        baseline, baseline_time = best_time(lambda: cosine_similarity_between_texts(orig_text, suspect_text), repeat)
+        line = f"{os.path.basename(path):<22}{baseline:>8.4f}"
+        for n in NGRAM_SIZES:
+            score, elapsed = best_time(lambda: cosine_similarity_between_char_ngrams(orig_text, suspect_text, n), repeat)
+            deviations[n].append(score - baseline)
+            speedups[n].append(baseline_time / elapsed)
+            line += f"{score:>8.4f}{score - baseline:>+8.4f}{baseline_time / elapsed:>8.1f}x"
+        print(line)
+
+    for n in NGRAM_SIZES:
+        mean_abs = sum(abs(d) for d in deviations[n]) / len(deviations[n])
+        worst = max(deviations[n], key=abs)
+        print(f"char{n}: 平均绝对偏差 {mean_abs:.4f}，最大偏差 {worst:+.4f}，"
+              f"平均加速 {sum(speedups[n]) / len(speedups[n]):.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import os
+import sys
+import glob
+import time
+
+# 将 check_plagiarism 目录加入 sys.path，以便导入主程序模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(current_dir))
+
+from main import read_file, preprocess_text, batch_similarity  # noqa: E402
+from lsh import lsh_batch_similarity, measure_recall  # noqa: E402
+
+# 待测的 (bands, rows, shingle_size) 组合
+SETTINGS = [
+    (32, 4, 1), (42, 3, 1), (64, 2, 1), (128, 1, 1),
+    (32, 4, 2), (64, 2, 2), (64, 2, 3),
+]
+
+
+def main():
+    """
+    以 orig*.txt 全部两两组合（不含文本与自身）的暴力 TF-IDF 得分为基准，测量不同 LSH 参数下的召回率和候选比例
+    用法: python lsh_recall.py [相似度阈值，默认 0.5]
+    """
+    threshold = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    paths = sorted(glob.glob(os.path.join(current_dir, 'orig*.txt')))
+    texts = [preprocess_text(read_file(path)) for path in paths]
+
+    start = time.perf_counter()
+    batch_similarity(texts, texts)
+    brute_force_time = time.perf_counter() - start
+    print(f"文档数: {len(texts)}，阈值: {threshold}，暴力计算耗时: {brute_force_time:.3f}s")
+    print(f"{'bands':>6} {'rows':>5} {'shingle':>8} {'recall':>7} {'found':>10} {'candidates':>11} {'time':>8}")
+    for bands, rows, shingle_size in SETTINGS:
+        result = measure_recall(texts, texts, threshold, bands=bands, rows=rows, shingle_size=shingle_size,
+                                exclude_self=True)
+        start = time.perf_counter()
+        lsh_batch_similarity(texts, texts, bands=bands, rows=rows, shingle_size=shingle_size)
+        elapsed = time.perf_counter() - start
+        print(f"{bands:>6} {rows:>5} {shingle_size:>8} {result['recall']:>7.2f} "
+              f"{result['found']:>4}/{result['relevant']:<5} {result['candidate_ratio']:>11.2%} {elapsed:>7.3f}s")
+
+
+if __name__ == '__main__':
+    main()
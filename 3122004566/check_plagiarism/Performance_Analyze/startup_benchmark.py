@@ -0,0 +1,75 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(current_dir)
+
+# 在全新的子进程中执行，测量导入耗时和首次计算耗时（秒），最后一行输出 JSON
+CHILD_CODE = '''
+import sys, time, json
+start = time.perf_counter()
+if {eager}:
+    import sklearn.feature_extraction.text, sklearn.metrics.pairwise
+sys.path.insert(0, {package_dir!r})
+import main
+if {state!r}:
+    main.load_tokenizer_state({state!r})
+imported = time.perf_counter()
+main.cosine_similarity_between_texts(main.preprocess_text({orig!r}), main.preprocess_text({suspect!r}))
+done = time.perf_counter()
+print(json.dumps({{'import': imported - start, 'first_call': done - imported, 'total': done - start}}))
+'''
+
+# 对比的启动方式：(名称, 是否在导入时加载 sklearn, 是否使用预生成的分词状态)
+MODES = [
+    ('eager import (before)', True, False),
+    ('lazy import', False, False),
+    ('lazy import + tokenizer state', False, True),
+]
+
+
+def run_child(eager, state_path, orig_text, suspect_text):
+    code = CHILD_CODE.format(eager=eager, package_dir=package_dir, state=state_path,
+                             orig=orig_text, suspect=suspect_text)
+    completed = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                               check=True, text=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    """
+    冷启动基准：分别在全新进程中测量导入耗时、首次计算耗时和总耗时，取多次运行的中位数
+    Jieba 自带的词典缓存（临时目录下的 jieba.cache）在第一次运行后就已存在，因此对比的是有缓存时的冷启动
+    """
+    parser = argparse.ArgumentParser(description="冷启动基准：比较立即导入、延迟导入和预生成分词状态的启动耗时")
+    parser.add_argument('--repeat', type=int, default=5, help='每种方式运行的次数，取中位数（默认 5）')
+    parser.add_argument('--chars', type=int, default=2000, help='测试文本截取的字符数（默认 2000，模拟短论文）')
+    args = parser.parse_args()
+
+    with open(os.path.join(current_dir, 'orig.txt'), 'r', encoding='utf-8') as f:
+        orig_text = f.read()[:args.chars]
+    with open(os.path.join(current_dir, 'orig_0.8_add.txt'), 'r', encoding='utf-8') as f:
+        suspect_text = f.read()[:args.chars]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        state_path = os.path.join(work_dir, 'tokenizer.state')
+        subprocess.run([sys.executable, os.path.join(package_dir, 'tokenizer_state.py'), state_path],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        # 预热一次，确保 Jieba 词典缓存已生成、文件已在页缓存中
+        run_child(True, None, orig_text, suspect_text)
+
+        print(f"{'mode':<32}{'import':>10}{'first call':>12}{'total':>10}")
+        for name, eager, use_state in MODES:
+            runs = [run_child(eager, state_path if use_state else None, orig_text, suspect_text)
+                    for _ in range(args.repeat)]
+            median = {key: statistics.median(run[key] for run in runs) for key in ('import', 'first_call', 'total')}
+            print(f"{name:<32}{median['import']:>9.3f}s{median['first_call']:>11.3f}s{median['total']:>9.3f}s")
+
+
+if __name__ == '__main__':
+    main()
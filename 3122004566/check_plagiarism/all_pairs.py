@@ -0,0 +1,108 @@
+import json
+import argparse
+import numpy as np
+
+from main import create_vectorizer, tokenize_texts, tokenizer_fingerprint, read_file, preprocess_text, collect_files
+
+
+def similar_pairs(tfidf_matrix, threshold=0.5, top_k=10, block_size=256):
+    """
+    分块计算 X·Xᵀ，每篇文档只保留相似度不低于 threshold 的前 top_k 个近邻
+    每次只有 block_size 行的相似度在内存中，峰值内存约为 block_size × 文档数
+    返回按 (i, j) 去重后的 (i, j, 相似度) 列表，其中 i < j
+    """
+    tfidf_matrix = tfidf_matrix.tocsr()
+    transposed = tfidf_matrix.T.tocsr()
+    doc_count = tfidf_matrix.shape[0]
+    pairs = {}
+    for start in range(0, doc_count, block_size):
+        end = min(start + block_size, doc_count)
+        block = (tfidf_matrix[start:end] @ transposed).tocsr()
+        for offset in range(end - start):
+            i = start + offset
+            row_start, row_end = block.indptr[offset], block.indptr[offset + 1]
+            columns = block.indices[row_start:row_end]
+            scores = block.data[row_start:row_end]
+            keep = (scores >= threshold) & (columns != i)
+            columns, scores = columns[keep], scores[keep]
+            if top_k and len(scores) > top_k:
+                best = np.argpartition(-scores, top_k - 1)[:top_k]
+                columns, scores = columns[best], scores[best]
+            for j, score in zip(columns.tolist(), scores.tolist()):
+                key = (i, j) if i < j else (j, i)
+                pairs[key] = max(score, pairs.get(key, 0.0))
+    return sorted(((i, j, score) for (i, j), score in pairs.items()), key=lambda pair: (-pair[2], pair[0], pair[1]))
+
+
+def cluster_pairs(pairs):
+    """
+    用并查集把相似文档对合并成可疑群组，返回按大小降序排列的文档下标列表
+    """
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j, _ in pairs:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups = {}
+    for x in parent:
+        groups.setdefault(find(x), []).append(x)
+    return sorted((sorted(members) for members in groups.values()), key=lambda members: (-len(members), members[0]))
+
+
+def all_pairs_similarity(texts, threshold=0.5, top_k=10, block_size=256, workers=1, cache=None):
+    """
+    对一组提交做两两比对：在全部文本上拟合一次 TF-IDF，分块求相似度，再聚成可疑群组
+    返回 (相似文档对列表, 群组列表)
+    """
+    tokens = tokenize_texts(texts, workers, cache=cache)
+    tfidf_matrix = create_vectorizer(pretokenized=True).fit_transform(tokens)
+    pairs = similar_pairs(tfidf_matrix, threshold, top_k, block_size)
+    return pairs, cluster_pairs(pairs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="提交目录两两查重：找出相互抄袭的可疑群组")
+    parser.add_argument('source', help='提交文件目录或清单文件')
+    parser.add_argument('output', help='输出文件路径（JSON，包含相似文档对和可疑群组）')
+    parser.add_argument('--threshold', type=float, default=0.5, help='相似度阈值（默认 0.5）')
+    parser.add_argument('--top-k', type=int, default=10, help='每篇文档最多保留的近邻数（默认 10，0 表示不限）')
+    parser.add_argument('--block-size', type=int, default=256, help='每次参与矩阵乘法的行数（默认 256），越小内存越省')
+    parser.add_argument('--workers', type=int, default=1, help='分词进程数（默认 1，0 表示使用全部 CPU 核心）')
+    parser.add_argument('--token-cache', help='分词缓存文件路径（SQLite）')
+    args = parser.parse_args(argv)
+
+    cache = None
+    if args.token_cache:
+        from token_cache import TokenCache
+        cache = TokenCache(args.token_cache, tokenizer_fingerprint())
+
+    paths = collect_files(args.source)
+    texts = [preprocess_text(read_file(path)) for path in paths]
+    pairs, clusters = all_pairs_similarity(texts, args.threshold, args.top_k, args.block_size, args.workers, cache)
+
+    result = {
+        'documents': len(paths),
+        'threshold': args.threshold,
+        'pairs': [{'a': paths[i], 'b': paths[j], 'similarity': round(score, 4)} for i, j, score in pairs],
+        'clusters': [[paths[i] for i in members] for members in clusters],
+    }
+    try:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"两两比对完成：{len(paths)} 篇文档，{len(pairs)} 对相似，{len(clusters)} 个可疑群组，结果已保存到 {args.output}")
+    except Exception as e:
+        print(f"写入 {args.output} 出错: {e}")
+        raise
+
+
+if __name__ == '__main__':
+    main()
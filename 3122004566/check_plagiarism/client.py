@@ -0,0 +1,79 @@
+import os
+import sys
+import json
+import socket
+import argparse
+import tempfile
+
+# 与 server.py 的默认值一致；客户端不导入 server/main，避免加载 sklearn 和 Jieba
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), 'check_plagiarism.sock')
+
+
+def read_file(file_path):
+    """
+    读取文件内容，行为与 main.read_file 相同
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+            if not content:
+                raise ValueError(f"文件 {file_path} 为空。")
+            return content
+    except FileNotFoundError:
+        print(f"未找到文件 {file_path}")
+        raise
+    except Exception as e:
+        print(f"读取文件错误 {file_path}: {e}")
+        raise
+
+
+def request_similarity(orig_text, plagiarized_text, socket_path=DEFAULT_SOCKET_PATH, port=None, timeout=60):
+    """
+    向查重服务发送一次请求并返回相似度
+    """
+    if port is not None:
+        conn = socket.create_connection(('127.0.0.1', port), timeout=timeout)
+    else:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.settimeout(timeout)
+        conn.connect(socket_path)
+    with conn, conn.makefile('rwb') as stream:
+        request = {'orig': orig_text, 'plagiarized': plagiarized_text}
+        stream.write((json.dumps(request, ensure_ascii=False) + '\n').encode('utf-8'))
+        stream.flush()
+        response = json.loads(stream.readline())
+    if 'error' in response:
+        raise RuntimeError(f"查重服务返回错误: {response['error']}")
+    return response['similarity']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="论文查重客户端：命令行参数与 main.py 相同，计算交给常驻的 server.py")
+    parser.add_argument('orig', help='论文原文文件路径')
+    parser.add_argument('plagiarized', help='疑似抄袭的文件路径')
+    parser.add_argument('output', help='输出的答案文件路径')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH, help=f'服务的 Unix 域套接字路径（默认 {DEFAULT_SOCKET_PATH}）')
+    parser.add_argument('--port', type=int, help='改为连接 127.0.0.1 上的 TCP 端口')
+    args = parser.parse_args()
+
+    orig_text = read_file(args.orig)
+    plagiarized_text = read_file(args.plagiarized)
+
+    try:
+        similarity = request_similarity(orig_text, plagiarized_text, args.socket, args.port)
+    except OSError as e:
+        print(f"无法连接查重服务，请先运行 python server.py: {e}")
+        sys.exit(1)
+
+    # 将相似度结果写入输出文件，格式与 main.py 相同
+    try:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(f"{similarity:.2f}")
+        print(f"相似度计算完成，结果已保存到 {args.output}")
+    except Exception as e:
+        print(f"写入 {args.output} 出错: {e}")
+        raise
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,465 @@
+import os
+import json
+import itertools
+import argparse
+import numpy as np
+from scipy.sparse import csr_matrix, csc_matrix
+
+from main import create_vectorizer, read_file, preprocess_text, collect_files, matrix_rows, write_batch_results
+
+# 索引目录中的文件
+META_FILE = 'meta.json'
+VOCABULARY_FILE = 'vocabulary.json'
+IDF_FILE = 'idf.npy'
+DOCS_FILE = 'docs.jsonl'
+INDPTR_FILE = 'indptr.bin'
+INDICES_FILE = 'indices.bin'
+DATA_FILE = 'data.bin'
+# 倒排表（CSC 数组）和词项最大权重，文件名中的 {} 为生成时的文档数；
+# 追加时整体写出新一代文件，meta.json 指向新一代后才生效，旧文件随后删除
+POSTINGS_INDPTR_FILE = 'postings_indptr.{}.bin'
+POSTINGS_INDICES_FILE = 'postings_indices.{}.bin'
+POSTINGS_DATA_FILE = 'postings_data.{}.bin'
+TERM_MAX_FILE = 'term_max.{}.bin'
+POSTINGS_FILES = (POSTINGS_INDPTR_FILE, POSTINGS_INDICES_FILE, POSTINGS_DATA_FILE, TERM_MAX_FILE)
+
+# 原始 CSR 数组的存储类型；indices 使用 int32，scipy 构造矩阵时可以直接引用内存映射而不复制
+INDPTR_DTYPE = np.int64
+INDICES_DTYPE = np.int32
+DATA_DTYPE = np.float64
+
+INDEX_VERSION = 1
+
+# 剪枝时为浮点舍入留出的余量：部分和与上界的累加顺序和精确得分不同，可能相差若干个 ulp
+BOUND_SLACK = 1e-9
+
+# 在倒排表中二分查找一个候选的开销约为顺序累加一个倒排项的倍数，用于选择第二阶段的处理方式
+SEARCH_COST = 8
+
+# 追加时合并倒排表，每次处理约这么多个倒排项，内存占用与语料大小无关
+MERGE_BLOCK = 1 << 22
+
+
+def _map_array(path, dtype, length):
+    """
+    以只读方式内存映射原始数组文件的前 length 个元素
+    """
+    if length == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(length,))
+
+
+class CorpusIndex:
+    """
+    参考语料库的磁盘索引
+    保存词汇表、IDF 权重以及 L2 归一化后的稀疏文档向量（原始 CSR 数组，可内存映射），
+    查询时只需 transform，不需要重新拟合；search 使用的倒排表和词项上界同样以原始数组保存并内存映射
+    """
+
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        with open(self._path(META_FILE), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != INDEX_VERSION:
+            raise ValueError(f"不支持的索引版本: {self.meta.get('version')}")
+        with open(self._path(VOCABULARY_FILE), 'r', encoding='utf-8') as f:
+            self.vocabulary = json.load(f)
+        self.idf = np.load(self._path(IDF_FILE), mmap_mode='r')
+        with open(self._path(DOCS_FILE), 'r', encoding='utf-8') as f:
+            self.doc_ids = [json.loads(line) for line in f][:self.meta['n_docs']]
+        self._vectorizer = None
+        self._matrix = None
+        self._postings = None
+        self._term_max = None
+        # search 复用的得分和候选标记缓冲区，每次查询后只清零用到的位置
+        self._scores = None
+        self._seen = None
+        # 打开时立即映射倒排表，之后追加删除旧一代文件也不影响已打开的索引
+        self._map_postings()
+
+    def _path(self, name):
+        return os.path.join(self.index_dir, name)
+
+    @property
+    def n_docs(self):
+        return self.meta['n_docs']
+
+    @property
+    def vectorizer(self):
+        """
+        使用保存的词汇表和 IDF 构造的 vectorizer，只用于 transform
+        """
+        if self._vectorizer is None:
+            vectorizer = create_vectorizer(vocabulary=self.vocabulary)
+            vectorizer.idf_ = np.asarray(self.idf)
+            self._vectorizer = vectorizer
+        return self._vectorizer
+
+    @property
+    def matrix(self):
+        """
+        内存映射的文档-词项 CSR 矩阵，形状为 (n_docs, 词汇表大小)
+        """
+        if self._matrix is None:
+            n_docs, nnz = self.meta['n_docs'], self.meta['nnz']
+            indptr = _map_array(self._path(INDPTR_FILE), INDPTR_DTYPE, n_docs + 1)
+            indices = _map_array(self._path(INDICES_FILE), INDICES_DTYPE, nnz)
+            data = _map_array(self._path(DATA_FILE), DATA_DTYPE, nnz)
+            self._matrix = csr_matrix((data, indices, indptr), shape=(n_docs, len(self.vocabulary)), copy=False)
+        return self._matrix
+
+    def _map_postings(self):
+        # 没有倒排表文件的旧索引不做映射，由 postings 在内存中转置得到
+        generation = self.meta.get('postings')
+        if generation is None:
+            return
+        n_terms, nnz = len(self.vocabulary), self.meta['nnz']
+        indptr = _map_array(self._path(POSTINGS_INDPTR_FILE.format(generation)), INDPTR_DTYPE, n_terms + 1)
+        indices = _map_array(self._path(POSTINGS_INDICES_FILE.format(generation)), INDICES_DTYPE, nnz)
+        data = _map_array(self._path(POSTINGS_DATA_FILE.format(generation)), DATA_DTYPE, nnz)
+        self._postings = csc_matrix((data, indices, indptr), shape=(self.n_docs, n_terms), copy=False)
+        self._postings.has_sorted_indices = True
+        self._term_max = _map_array(self._path(TERM_MAX_FILE.format(generation)), DATA_DTYPE, n_terms)
+
+    @property
+    def postings(self):
+        """
+        倒排表：按词项组织的 CSC 矩阵，第 t 列为包含词项 t 的文档下标（升序）及其权重
+        构建和追加时写入索引目录，打开时内存映射；旧版本的索引没有倒排表文件，首次使用时由文档矩阵转置得到
+        """
+        if self._postings is None:
+            postings = self.matrix.tocsc()
+            postings.sort_indices()
+            self._postings = postings
+        return self._postings
+
+    @property
+    def term_max(self):
+        """
+        每个词项在所有文档中的最大权重，用于估计文档得分的上界
+        """
+        if self._term_max is None:
+            self._term_max = self.postings.max(axis=0).toarray().ravel()
+        return self._term_max
+
+    @classmethod
+    def build(cls, index_dir, texts, doc_ids):
+        """
+        在参考语料上拟合词汇表和 IDF，并写出新的索引
+        """
+        texts = list(texts)
+        doc_ids = list(doc_ids)
+        if len(texts) != len(doc_ids):
+            raise ValueError("文本数量与文档编号数量不一致。")
+        if not texts:
+            raise ValueError("构建索引至少需要一篇文档。")
+
+        vectorizer = create_vectorizer()
+        tfidf_matrix = vectorizer.fit_transform(texts)
+        vocabulary = {term: int(i) for term, i in vectorizer.vocabulary_.items()}
+
+        os.makedirs(index_dir, exist_ok=True)
+        with open(os.path.join(index_dir, VOCABULARY_FILE), 'w', encoding='utf-8') as f:
+            json.dump(vocabulary, f, ensure_ascii=False)
+        np.save(os.path.join(index_dir, IDF_FILE), vectorizer.idf_)
+        for name in (INDPTR_FILE, INDICES_FILE, DATA_FILE, DOCS_FILE):
+            open(os.path.join(index_dir, name), 'wb').close()
+        np.zeros(1, dtype=INDPTR_DTYPE).tofile(os.path.join(index_dir, INDPTR_FILE))
+        cls._write_meta(index_dir, {'version': INDEX_VERSION, 'n_docs': 0, 'nnz': 0})
+
+        index = cls(index_dir)
+        index._append_matrix(tfidf_matrix, doc_ids)
+        return index
+
+    @staticmethod
+    def _write_meta(index_dir, meta):
+        # 先写临时文件再替换，保证元数据要么是旧的要么是新的
+        tmp_path = os.path.join(index_dir, META_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(index_dir, META_FILE))
+
+    def append(self, texts, doc_ids):
+        """
+        追加新文档：使用已保存的词汇表和 IDF 做 transform，不重建索引
+        新文档中未出现在词汇表里的词会被忽略，需要更新词汇表时请重新 build
+        """
+        texts = list(texts)
+        doc_ids = list(doc_ids)
+        if len(texts) != len(doc_ids):
+            raise ValueError("文本数量与文档编号数量不一致。")
+        if not texts:
+            return
+        self._append_matrix(self.vectorizer.transform(texts), doc_ids)
+
+    def _append_matrix(self, tfidf_matrix, doc_ids):
+        n_docs, nnz = self.meta['n_docs'], self.meta['nnz']
+        # 截掉上次中断的追加可能留下的多余数据，以 meta.json 中的计数为准
+        sizes = {
+            INDPTR_FILE: (n_docs + 1) * np.dtype(INDPTR_DTYPE).itemsize,
+            INDICES_FILE: nnz * np.dtype(INDICES_DTYPE).itemsize,
+            DATA_FILE: nnz * np.dtype(DATA_DTYPE).itemsize,
+        }
+        for name, size in sizes.items():
+            os.truncate(self._path(name), size)
+
+        tfidf_matrix = csr_matrix(tfidf_matrix)
+        with open(self._path(INDPTR_FILE), 'ab') as f:
+            (tfidf_matrix.indptr[1:].astype(INDPTR_DTYPE) + nnz).tofile(f)
+        with open(self._path(INDICES_FILE), 'ab') as f:
+            tfidf_matrix.indices.astype(INDICES_DTYPE).tofile(f)
+        with open(self._path(DATA_FILE), 'ab') as f:
+            tfidf_matrix.data.astype(DATA_DTYPE).tofile(f)
+
+        # docs.jsonl 同样以 meta.json 为准，丢弃多余行后整体写入临时文件再替换，
+        # 中断时旧文件保持完整；替换后、meta.json 更新前中断时多出的行在加载时被截掉
+        kept_ids = self.doc_ids[:n_docs]
+        tmp_path = self._path(DOCS_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for doc_id in kept_ids + doc_ids:
+                f.write(json.dumps(doc_id, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self._path(DOCS_FILE))
+
+        generation = n_docs + len(doc_ids)
+        self._write_postings(tfidf_matrix, generation)
+
+        self.meta = dict(self.meta, n_docs=n_docs + len(doc_ids), nnz=nnz + tfidf_matrix.nnz, postings=generation)
+        self._write_meta(self.index_dir, self.meta)
+        self.doc_ids = kept_ids + doc_ids
+        # 文档数已变，依赖文档矩阵的缓存全部失效
+        self._matrix = None
+        self._postings = None
+        self._term_max = None
+        self._scores = None
+        self._seen = None
+        self._map_postings()
+        self._remove_stale_postings(generation)
+
+    def _write_postings(self, tfidf_matrix, generation):
+        """
+        把已有倒排表与新文档的倒排表合并，写出第 generation 代倒排表文件和词项最大权重
+        新文档的下标都大于已有文档，每个词项的倒排表直接把新文档接在已有文档之后，仍保持升序；
+        按块合并，不需要把整个倒排表读入内存
+        """
+        n_docs = self.meta['n_docs']
+        old = self.postings
+        new = tfidf_matrix.tocsc()
+        new.sort_indices()
+        indptr = old.indptr.astype(INDPTR_DTYPE) + new.indptr
+        indptr.tofile(self._path(POSTINGS_INDPTR_FILE.format(generation)))
+        term_max = new.max(axis=0).toarray().ravel()
+        if n_docs:
+            term_max = np.maximum(self.term_max, term_max)
+        term_max.astype(DATA_DTYPE).tofile(self._path(TERM_MAX_FILE.format(generation)))
+
+        n_terms = len(indptr) - 1
+        with open(self._path(POSTINGS_INDICES_FILE.format(generation)), 'wb') as f_indices, \
+                open(self._path(POSTINGS_DATA_FILE.format(generation)), 'wb') as f_data:
+            a = 0
+            while a < n_terms:
+                b = int(np.searchsorted(indptr, indptr[a] + MERGE_BLOCK, side='right')) - 1
+                b = min(max(b, a + 1), n_terms)
+                old_lo, old_hi = old.indptr[a], old.indptr[b]
+                new_lo, new_hi = new.indptr[a], new.indptr[b]
+                # 已有倒排项后移本列之前的新倒排项个数，新倒排项后移到本列已有倒排项之后
+                old_pos = np.arange(old_hi - old_lo) + np.repeat(new.indptr[a:b] - new_lo, np.diff(old.indptr[a:b + 1]))
+                new_pos = np.arange(new_hi - new_lo) + np.repeat(old.indptr[a + 1:b + 1] - old_lo,
+                                                                 np.diff(new.indptr[a:b + 1]))
+                indices = np.empty(indptr[b] - indptr[a], dtype=INDICES_DTYPE)
+                data = np.empty(indptr[b] - indptr[a], dtype=DATA_DTYPE)
+                indices[old_pos] = old.indices[old_lo:old_hi]
+                indices[new_pos] = new.indices[new_lo:new_hi] + n_docs
+                data[old_pos] = old.data[old_lo:old_hi]
+                data[new_pos] = new.data[new_lo:new_hi]
+                indices.tofile(f_indices)
+                data.tofile(f_data)
+                a = b
+
+    def _remove_stale_postings(self, generation):
+        # 删除其他代的倒排表文件（上一代和中断的追加留下的）；已映射旧文件的进程不受影响
+        current = {name.format(generation) for name in POSTINGS_FILES}
+        prefixes = tuple(name.split('{}')[0] for name in POSTINGS_FILES)
+        for name in os.listdir(self.index_dir):
+            if name.startswith(prefixes) and name not in current:
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    pass
+
+    def query(self, texts):
+        """
+        计算查询文本与索引中所有文档的 Cosine 相似度
+        返回形状为 (len(texts), n_docs) 的数组
+        """
+        query_matrix = self.vectorizer.transform(list(texts))
+        # 文档向量和查询向量都已 L2 归一化，一次稀疏矩阵乘向量即得全部 Cosine 相似度
+        return (self.matrix @ query_matrix.T).T.toarray()
+
+    def search(self, text, k=10, threshold=0.0):
+        """
+        精确的 top-k / 阈值查询：返回 (结果列表 [(文档下标, 相似度)], 统计信息)
+        结果为得分不低于 threshold 的文档按得分降序（同分按下标）排列后的前 k 个，k 为 None 表示不限，
+        与对 query 的暴力结果排序截取完全相同；threshold 不大于 0 且得分为正的文档不足 k 个时，
+        与暴力结果一样按下标补上得分为 0 的文档
+
+        采用按词项顺序累加的 max-score 剪枝：查询词按 查询权重 × 该词最大文档权重 降序处理，
+        只要剩余词项的上界之和仍可能达到门槛，就遍历该词的整个倒排表收集候选文档；
+        此后未出现过的文档不可能达到门槛，剩余词项只在倒排表中二分查找已有候选，
+        并不断淘汰 部分得分 + 剩余上界 低于门槛的候选。门槛为 threshold 与当前第 k 大部分得分中的较大者。
+        门槛和淘汰每处理一批词项（批大小逐次翻倍）才更新一次，每步的开销只与本词倒排表和候选数有关，
+        与文档总数无关；门槛偏低只会多处理几个词项，不影响结果。
+        最后对剩余候选用与 query 相同的稀疏矩阵乘法重新计算精确得分
+        """
+        if k is None and threshold <= 0:
+            raise ValueError("search 需要指定 k 或正的 threshold。")
+        query_vector = self.vectorizer.transform([text])
+        postings = self.postings
+        terms = query_vector.indices
+        weights = query_vector.data
+        bounds = weights * self.term_max[terms]
+        order = np.argsort(-bounds, kind='stable')
+        terms, weights, bounds = terms[order], weights[order], bounds[order]
+        # remaining[i] 为第 i 个及之后词项的上界之和
+        remaining = np.append(np.cumsum(bounds[::-1])[::-1], 0.0)
+        lengths = postings.indptr[terms + 1] - postings.indptr[terms]
+
+        if self._scores is None:
+            self._scores = np.zeros(self.n_docs)
+            self._seen = np.zeros(self.n_docs, dtype=bool)
+        scores, seen = self._scores, self._seen
+        touched = 0
+
+        def cutoff(candidates):
+            # 部分得分是最终得分的下界，第 k 大部分得分可以作为门槛
+            if k is None or len(candidates) < k:
+                return threshold
+            kth = np.partition(scores[candidates], len(candidates) - k)[len(candidates) - k]
+            return max(threshold, kth)
+
+        # visited 为出现过的全部文档，按出现顺序分段保存，清零缓冲区时也只需处理这些位置
+        visited = []
+        try:
+            # 第一阶段：遍历完整倒排表，收集候选
+            theta = threshold
+            i = 0
+            batch = 1
+            while i < len(terms) and remaining[i] >= theta - BOUND_SLACK:
+                batch_end = min(i + batch, len(terms))
+                while i < batch_end and remaining[i] >= theta - BOUND_SLACK:
+                    start, end = postings.indptr[terms[i]], postings.indptr[terms[i] + 1]
+                    docs = postings.indices[start:end]
+                    scores[docs] += weights[i] * postings.data[start:end]
+                    visited.append(docs[~seen[docs]])
+                    seen[docs] = True
+                    touched += end - start
+                    i += 1
+                batch *= 2
+                if k is not None:
+                    visited = [np.concatenate(visited)]
+                    theta = cutoff(visited[0])
+            candidates = np.sort(np.concatenate(visited)) if visited else np.empty(0, dtype=postings.indices.dtype)
+
+            # 第二阶段：只更新已有候选，并淘汰不可能达到门槛的文档
+            batch = 1
+            while len(candidates):
+                candidates = candidates[scores[candidates] + remaining[i] >= theta - BOUND_SLACK]
+                if i == len(terms) or not len(candidates):
+                    break
+                batch_end = min(i + batch, len(terms))
+                while i < batch_end:
+                    start, end = postings.indptr[terms[i]], postings.indptr[terms[i] + 1]
+                    docs = postings.indices[start:end]
+                    if len(candidates) * SEARCH_COST >= end - start:
+                        # 候选比倒排表还多时，直接累加整个倒排表比逐个二分查找更快；
+                        # 非候选文档的得分不会再被读取，只需记下以便清零
+                        scores[docs] += weights[i] * postings.data[start:end]
+                        visited.append(docs)
+                        touched += end - start
+                    else:
+                        positions = np.searchsorted(docs, candidates)
+                        found = positions < len(docs)
+                        found[found] = docs[positions[found]] == candidates[found]
+                        scores[candidates[found]] += weights[i] * postings.data[start + positions[found]]
+                        touched += len(candidates)
+                    i += 1
+                batch *= 2
+                theta = cutoff(candidates)
+        finally:
+            # 只清零本次用到的位置，缓冲区留给下一次查询
+            for docs in visited:
+                scores[docs] = 0.0
+                seen[docs] = False
+
+        exact = (self.matrix[candidates] @ query_vector.T).toarray().ravel() if len(candidates) else np.empty(0)
+        keep = (exact >= threshold) & (exact > 0)
+        results = sorted(zip(candidates[keep].tolist(), exact[keep].tolist()), key=lambda item: (-item[1], item[0]))
+        if k is not None:
+            results = results[:k]
+            if threshold <= 0 and len(results) < k:
+                # 得分为 0 的文档不在倒排表中，按下标补足
+                matched = {doc for doc, _ in results}
+                zeros = (doc for doc in range(self.n_docs) if doc not in matched)
+                results.extend((doc, 0.0) for doc in itertools.islice(zeros, k - len(results)))
+        stats = {
+            'postings_touched': int(touched),
+            'query_postings': int(lengths.sum()),
+            'candidates': int(len(candidates)),
+        }
+        return results, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="参考语料库索引：构建、追加与查询")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='在参考语料上构建新索引')
+    build_parser.add_argument('index_dir', help='索引目录')
+    build_parser.add_argument('source', help='参考文档目录或清单文件')
+
+    append_parser = subparsers.add_parser('append', help='向已有索引追加文档')
+    append_parser.add_argument('index_dir', help='索引目录')
+    append_parser.add_argument('source', help='待追加的文档目录或清单文件')
+
+    query_parser = subparsers.add_parser('query', help='用疑似抄袭文件查询索引')
+    query_parser.add_argument('index_dir', help='索引目录')
+    query_parser.add_argument('suspect', help='疑似抄袭的文件路径或目录')
+    query_parser.add_argument('output', help='输出文件路径（.csv 或 .jsonl）')
+    query_parser.add_argument('--manifest', action='store_true', help='suspect 为清单文件，每行一个路径')
+    query_parser.add_argument('--top-k', type=int, help='只输出每篇疑似文件最相似的 K 篇文档（剪枝查询，结果与全量计算相同）')
+    query_parser.add_argument('--threshold', type=float, default=0.0, help='只输出相似度不低于该值的文档（剪枝查询）')
+    args = parser.parse_args(argv)
+
+    if args.command in ('build', 'append'):
+        paths = collect_files(args.source)
+        texts = [preprocess_text(read_file(path)) for path in paths]
+        if args.command == 'build':
+            index = CorpusIndex.build(args.index_dir, texts, paths)
+        else:
+            index = CorpusIndex(args.index_dir)
+            index.append(texts, paths)
+        print(f"索引已更新，共 {index.n_docs} 篇文档，词汇表大小 {len(index.vocabulary)}")
+    else:
+        index = CorpusIndex(args.index_dir)
+        if args.manifest or os.path.isdir(args.suspect):
+            suspect_paths = collect_files(args.suspect)
+        else:
+            suspect_paths = [args.suspect]
+        suspect_texts = [preprocess_text(read_file(path)) for path in suspect_paths]
+        if args.top_k is None and args.threshold <= 0:
+            similarity_matrix = index.query(suspect_texts)
+            write_batch_results(args.output, matrix_rows(suspect_paths, index.doc_ids, similarity_matrix))
+            print(f"查询完成，结果已保存到 {args.output}")
+            return
+        rows = []
+        touched = total = 0
+        for suspect_path, text in zip(suspect_paths, suspect_texts):
+            results, stats = index.search(text, args.top_k, args.threshold)
+            rows.extend((suspect_path, index.doc_ids[doc], score) for doc, score in results)
+            touched += stats['postings_touched']
+            total += stats['query_postings']
+        write_batch_results(args.output, rows)
+        print(f"查询完成，共 {len(rows)} 条结果，访问倒排项 {touched}/{total}，结果已保存到 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+import zlib
+from collections import defaultdict
+import numpy as np
+
+from main import tokenize_texts, create_vectorizer, batch_similarity
+
+# MinHash 使用的哈希族 h(x) = (a * x + b) mod p，p 取梅森素数 2^31 - 1，
+# 保证 a * x + b 在 uint64 内不会溢出
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def shingle_hashes(tokens, shingle_size=1):
+    """
+    将词序列切成长度为 shingle_size 的连续词组（shingle），返回去重后的 32 位哈希数组
+    空白符不参与 shingle；词数不足 shingle_size 时整段作为一个 shingle
+    """
+    words = [token for token in tokens if token.strip()]
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    count = max(1, len(words) - shingle_size + 1)
+    hashes = {zlib.crc32('\x00'.join(words[i:i + shingle_size]).encode('utf-8')) for i in range(count)}
+    return np.fromiter(hashes, dtype=np.uint64, count=len(hashes)) % MERSENNE_PRIME
+
+
+class MinHashLSH:
+    """
+    MinHash 签名 + LSH 分段索引
+    签名长度为 bands * rows；两篇文档 shingle 集合的 Jaccard 相似度为 s 时，
+    成为候选对的概率为 1 - (1 - s^rows)^bands。增大 bands 或减小 rows 提高召回，反之减少候选
+    默认参数按 Performance_Analyze/lsh_recall.py 在 orig_0.8_*.txt 上的测量选取：
+    改写后的文本连续词组重合很少，单个词作为 shingle 时召回明显更高
+    """
+
+    def __init__(self, bands=64, rows=2, shingle_size=1, seed=1):
+        if bands <= 0 or rows <= 0:
+            raise ValueError("bands 和 rows 必须为正整数。")
+        self.bands = bands
+        self.rows = rows
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        num_perm = bands * rows
+        self._a = rng.randint(1, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+        self.doc_ids = []
+
+    @property
+    def threshold(self):
+        """
+        成为候选对概率约为 50% 时对应的 Jaccard 相似度
+        """
+        return (1.0 / self.bands) ** (1.0 / self.rows)
+
+    def signature(self, tokens):
+        """
+        计算词序列的 MinHash 签名
+        """
+        hashes = shingle_hashes(tokens, self.shingle_size)
+        signature = np.full(self.bands * self.rows, MERSENNE_PRIME, dtype=np.uint64)
+        # 分块计算，限制 (签名长度 × shingle 数) 中间矩阵的大小
+        for start in range(0, hashes.size, 4096):
+            block = hashes[start:start + 4096]
+            values = (np.outer(self._a, block) + self._b[:, None]) % MERSENNE_PRIME
+            np.minimum(signature, values.min(axis=1), out=signature)
+        return signature
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, doc_id, tokens):
+        """
+        将文档加入索引
+        """
+        signature = self.signature(tokens)
+        for band, key in self._band_keys(signature):
+            self._buckets[band][key].append(doc_id)
+        self.doc_ids.append(doc_id)
+
+    def query(self, tokens):
+        """
+        返回与词序列在任一分段上签名相同的候选文档编号集合
+        """
+        signature = self.signature(tokens)
+        candidates = set()
+        for band, key in self._band_keys(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+        return candidates
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+
+def lsh_batch_similarity(orig_texts, suspect_texts, bands=64, rows=2, shingle_size=1, workers=1, cache=None):
+    """
+    先用 MinHash/LSH 为每篇疑似文本挑选候选原文，只对候选对计算 TF-IDF Cosine 相似度
+    返回 (疑似文本下标, 原文下标, 相似度) 列表，得分与 batch_similarity 中对应位置相同
+    workers 和 cache 的含义同 tokenize_texts
+    """
+    orig_texts = list(orig_texts)
+    tokens = tokenize_texts(orig_texts + list(suspect_texts), workers, cache=cache)
+    orig_tokens = tokens[:len(orig_texts)]
+    suspect_tokens = tokens[len(orig_texts):]
+
+    index = MinHashLSH(bands=bands, rows=rows, shingle_size=shingle_size)
+    for j, tokens in enumerate(orig_tokens):
+        index.add(j, tokens)
+    candidate_pairs = [(i, j) for i, tokens in enumerate(suspect_tokens) for j in sorted(index.query(tokens))]
+    if not candidate_pairs:
+        return []
+
+    # 与 batch_similarity 一样在全部文本上拟合一次，只是只计算候选对的点积
+    tfidf_matrix = create_vectorizer(pretokenized=True).fit_transform(orig_tokens + suspect_tokens)
+    orig_count = len(orig_tokens)
+    suspect_rows = tfidf_matrix[[orig_count + i for i, _ in candidate_pairs]]
+    orig_rows = tfidf_matrix[[j for _, j in candidate_pairs]]
+    similarities = np.asarray(suspect_rows.multiply(orig_rows).sum(axis=1)).ravel()
+    return [(i, j, similarity) for (i, j), similarity in zip(candidate_pairs, similarities)]
+
+
+def measure_recall(orig_texts, suspect_texts, threshold, bands=64, rows=2, shingle_size=1, exclude_self=False):
+    """
+    以暴力计算的全部得分为基准，统计相似度不低于 threshold 的文本对中被 LSH 选为候选的比例
+    exclude_self 为 True 时两组文本是同一组，不统计文本与自身组成的对（它们必然成为候选，会抬高召回率）
+    返回 {'recall', 'relevant', 'found', 'candidates', 'candidate_ratio'}
+    """
+    similarity_matrix = batch_similarity(orig_texts, suspect_texts)
+    relevant = {(i, j) for i, j in zip(*np.nonzero(similarity_matrix >= threshold))}
+    pairs = lsh_batch_similarity(orig_texts, suspect_texts, bands=bands, rows=rows, shingle_size=shingle_size)
+    candidates = {(i, j) for i, j, _ in pairs}
+    total = similarity_matrix.size
+    if exclude_self:
+        relevant = {(i, j) for i, j in relevant if i != j}
+        candidates = {(i, j) for i, j in candidates if i != j}
+        total -= min(similarity_matrix.shape)
+    found = len(relevant & candidates)
+    return {
+        'recall': found / len(relevant) if relevant else 1.0,
+        'relevant': len(relevant),
+        'found': found,
+        'candidates': len(candidates),
+        'candidate_ratio': len(candidates) / total if total else 0.0,
+    }
@@ -1,34 +1,287 @@
-import sys
+import os
+import csv
+import json
+import time
+import atexit
 import threading
+import argparse
 import re  # 用于正则表达式操作，以便去除标点符号
 import jieba  # 引入 Jieba 分词库
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+# sklearn、asyncio 和进程池在首次使用时才导入：导入 sklearn 约占短文本单次运行的一半时间
+
+class Metrics:
+    """
+    运行时指标：累计各阶段的调用次数、耗时以及处理的字节数/词数，另外记录词汇表大小等瞬时值
+    可输出为 JSON Lines（每次 flush 追加一行快照）或 Prometheus textfile（每次 flush 整体覆盖）
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.stages = {}
+        self.gauges = {}
+        # 常驻服务中多个请求线程会同时记录，累加和写出都在锁内完成
+        self.lock = threading.Lock()
+
+    def record(self, stage, seconds, **counters):
+        with self.lock:
+            entry = self.stages.setdefault(stage, {'calls': 0, 'seconds': 0.0})
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            for name, value in counters.items():
+                entry[name] = entry.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def snapshot(self):
+        with self.lock:
+            stages = {stage: dict(entry) for stage, entry in self.stages.items()}
+            gauges = dict(self.gauges)
+        return {'time': time.time(), 'pid': os.getpid(), 'stages': stages, 'gauges': gauges}
+
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        stages, gauges = snapshot['stages'], snapshot['gauges']
+        lines = []
+        counter_names = sorted({name for entry in stages.values() for name in entry})
+        for name in counter_names:
+            metric = f"check_plagiarism_stage_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for stage, entry in sorted(stages.items()):
+                if name in entry:
+                    lines.append(f'{metric}{{stage="{stage}"}} {entry[name]}')
+        for name, value in sorted(gauges.items()):
+            lines.append(f"# TYPE check_plagiarism_{name} gauge")
+            lines.append(f"check_plagiarism_{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def flush(self):
+        """
+        写出当前指标：扩展名为 .prom 时写 Prometheus textfile（先写临时文件再替换），否则追加一行 JSON
+        """
+        if self.output_path.endswith('.prom'):
+            tmp_path = f"{self.output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, self.output_path)
+        else:
+            with open(self.output_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(self.snapshot(), ensure_ascii=False) + '\n')
+
+# 全局指标，为 None 时不记录；通过 --metrics 参数或环境变量 CHECK_PLAGIARISM_METRICS 指定输出文件启用
+metrics = None
+
+def enable_metrics(output_path):
+    """
+    启用指标记录，进程退出时自动写出一次
+    """
+    global metrics
+    if metrics is None:
+        atexit.register(flush_metrics)
+    metrics = Metrics(output_path)
+    return metrics
+
+def record_metric(stage, seconds, **counters):
+    if metrics is not None:
+        metrics.record(stage, seconds, **counters)
+
+def flush_metrics():
+    if metrics is not None:
+        metrics.flush()
+
+if os.environ.get('CHECK_PLAGIARISM_METRICS'):
+    enable_metrics(os.environ['CHECK_PLAGIARISM_METRICS'])
 
 # 停用词列表（使用 list 而非 set）
 stop_words = ['的', '了', '是', '我', '在', '和', '也', '不', '有', '就', '人', '都', '一', '一个']
 
-# 创建一个全局的 TfidfVectorizer 实例，避免重复构建词汇表
-vectorizer = TfidfVectorizer(tokenizer=lambda x: jieba.lcut(x), stop_words=stop_words)
-vectorizer_lock = threading.Lock()  # 锁，用于线程安全
+stop_word_set = frozenset(stop_words)
+
+# 通过 load_tokenizer_state 加载的分词状态摘要，参与分词配置指纹
+tokenizer_state_digest = None
+# 加载的分词状态文件路径，传给进程池的工作进程重新加载
+tokenizer_state_path = None
+
+def load_tokenizer_state(path):
+    """
+    加载 tokenizer_state.py 生成的分词状态：直接恢复 Jieba 前缀词典（含用户词典）和停用词表，
+    不再读取词典文件、重建前缀词典
+    """
+    global stop_words, stop_word_set, tokenizer_state_digest, tokenizer_state_path
+    from tokenizer_state import load_state
+    start = time.perf_counter()
+    tokenizer_state_digest, stop_words = load_state(path)
+    stop_word_set = frozenset(stop_words)
+    tokenizer_state_path = os.path.abspath(path)
+    record_metric('tokenizer_state', time.perf_counter() - start)
+
+if os.environ.get('CHECK_PLAGIARISM_TOKENIZER_STATE'):
+    load_tokenizer_state(os.environ['CHECK_PLAGIARISM_TOKENIZER_STATE'])
+
+def tokenize_text(text):
+    """
+    对文本分词，流程与 vectorizer 内部一致：转小写、Jieba 分词、去除停用词
+    """
+    start = time.perf_counter()
+    tokens = [token for token in jieba.lcut(text.lower()) if token not in stop_word_set]
+    record_metric('tokenize', time.perf_counter() - start, chars=len(text), tokens=len(tokens))
+    return tokens
+
+def split_paragraphs(text, chunk_size=32 * 1024):
+    """
+    在换行符之后切分文本，并把相邻段落合并成约 chunk_size 个字符的块
+    换行符是 Jieba 的分块边界，因此各块分词结果依次拼接与整篇分词完全相同
+    """
+    chunks = []
+    current = []
+    current_size = 0
+    for paragraph in re.split(r'(?<=\n)', text):
+        current.append(paragraph)
+        current_size += len(paragraph)
+        if current_size >= chunk_size:
+            chunks.append(''.join(current))
+            current = []
+            current_size = 0
+    if current or not chunks:
+        chunks.append(''.join(current))
+    return chunks
+
+def _init_tokenizer_worker(state_path=None):
+    # 每个工作进程只加载一次 Jieba 词典；spawn 和 forkserver 启动的进程不继承父进程加载的分词状态，在这里重新加载
+    if state_path and state_path != tokenizer_state_path:
+        load_tokenizer_state(state_path)
+    jieba.initialize()
+
+def tokenizer_worker_initargs():
+    """
+    进程池以 _init_tokenizer_worker 为 initializer 时的 initargs，把当前加载的分词状态传给工作进程
+    """
+    return (tokenizer_state_path,)
+
+def tokenizer_fingerprint():
+    """
+    描述当前分词配置的字符串，用作分词缓存键的一部分：Jieba 版本与词典、停用词表、分析流程
+    """
+    dictionary = jieba.dt.dictionary
+    config = {
+        'analyzer': 'lower+jieba.lcut+stop_words',
+        'jieba': jieba.__version__,
+        'dictionary': dictionary or 'default',
+        'stop_words': stop_words,
+    }
+    if dictionary and os.path.exists(dictionary):
+        stat = os.stat(dictionary)
+        config['dictionary_stat'] = [stat.st_size, stat.st_mtime_ns]
+    if tokenizer_state_digest:
+        config['state'] = tokenizer_state_digest
+    return json.dumps(config, ensure_ascii=False, sort_keys=True)
+
+def tokenize_texts(texts, workers=1, chunk_size=32 * 1024, cache=None, mp_context=None):
+    """
+    对多篇文本分词，结果与 [tokenize_text(text) for text in texts] 完全相同
+    workers 大于 1 时按段落切块，分发到进程池中并行分词；workers 为 0 或 None 时使用全部 CPU 核心
+    cache 为 token_cache.TokenCache 时先查缓存，只对未命中的文本分词并写回缓存
+    mp_context 为进程池使用的 multiprocessing 上下文，默认为平台的启动方式
+    """
+    texts = list(texts)
+    if cache is not None:
+        results = cache.get_many(texts)
+        missing = [i for i, tokens in enumerate(results) if tokens is None]
+        record_metric('token_cache', 0.0, hits=len(texts) - len(missing), misses=len(missing))
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            missing_tokens = tokenize_texts(missing_texts, workers, chunk_size, mp_context=mp_context)
+            cache.put_many(missing_texts, missing_tokens)
+            for i, tokens in zip(missing, missing_tokens):
+                results[i] = tokens
+        return results
+
+    if workers == 1:
+        return [tokenize_text(text) for text in texts]
+
+    chunks = []
+    owners = []
+    for i, text in enumerate(texts):
+        for chunk in split_paragraphs(text, chunk_size):
+            chunks.append(chunk)
+            owners.append(i)
+
+    from concurrent.futures import ProcessPoolExecutor
+    results = [[] for _ in texts]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or None, mp_context=mp_context, initializer=_init_tokenizer_worker,
+                             initargs=tokenizer_worker_initargs()) as pool:
+        # map 按提交顺序返回结果，依次拼接即可还原每篇文本的词序列
+        for owner, tokens in zip(owners, pool.map(tokenize_text, chunks)):
+            results[owner].extend(tokens)
+    # 工作进程中的指标不会传回，这里记录并行分词的总墙钟时间
+    record_metric('tokenize', time.perf_counter() - start,
+                  chars=sum(len(text) for text in texts), tokens=sum(len(tokens) for tokens in results))
+    return results
+
+def _pretokenized_analyzer(tokens):
+    # 输入已经是 tokenize_text 的结果，原样交给 vectorizer
+    return tokens
+
+def create_vectorizer(pretokenized=False, **options):
+    """
+    创建一个使用 Jieba 分词和停用词表的 TfidfVectorizer
+    pretokenized 为 True 时，vectorizer 接收 tokenize_text 产生的词列表而不是原始文本，结果与直接传入文本相同
+    options 会原样传给 TfidfVectorizer，例如传入 vocabulary 固定词汇表
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    if pretokenized:
+        return TfidfVectorizer(analyzer=_pretokenized_analyzer, **options)
+    return TfidfVectorizer(tokenizer=lambda x: jieba.lcut(x), stop_words=stop_words, **options)
+
+def create_char_ngram_vectorizer(n=2, **options):
+    """
+    创建以字符 n-gram 为特征的 TfidfVectorizer，不经过 Jieba 分词；连续空白会被合并为一个空格
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    return TfidfVectorizer(analyzer='char', ngram_range=(n, n), **options)
+
+def similarity_fingerprint(char_ngram=None):
+    """
+    描述单对相似度计算配置的字符串，用作结果缓存键的一部分：分词配置、TF-IDF 参数以及 sklearn 版本
+    只读取包的元数据而不导入 sklearn，结果缓存命中时整个运行都不需要加载 sklearn
+    char_ngram 不为 None 时描述字符 n-gram 快速模式，此时与分词配置无关
+    """
+    from importlib.metadata import version
+    config = {
+        'model': 'pairwise-tfidf-cosine',
+        # 两种 vectorizer 除特征提取方式外都使用默认参数，默认值随 sklearn 版本确定
+        'sklearn': version('scikit-learn'),
+    }
+    if char_ngram:
+        config['vectorizer'] = f'TfidfVectorizer(analyzer=char, ngram_range=({char_ngram}, {char_ngram}))'
+    else:
+        config['vectorizer'] = 'TfidfVectorizer(analyzer=pretokenized)'
+        config['tokenizer'] = json.loads(tokenizer_fingerprint())
+    return json.dumps(config, ensure_ascii=False, sort_keys=True)
 
 def preprocess_text(text):
     """
     预处理文本，去除标点符号
     """
+    start = time.perf_counter()
     # 去除标点符号
-    text = re.sub(r'[^\w\s]', '', text)
-    return text
+    result = re.sub(r'[^\w\s]', '', text)
+    record_metric('preprocess', time.perf_counter() - start, chars=len(text))
+    return result
 
 def read_file(file_path):
     """
     读取文件内容
     """
     try:
+        start = time.perf_counter()
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
             if not content:
                 raise ValueError(f"文件 {file_path} 为空。")
+            record_metric('read', time.perf_counter() - start, bytes=f.tell())
             return content
     except FileNotFoundError:
         print(f"未找到文件 {file_path}")
@@ -40,42 +293,208 @@ def read_file(file_path):
 def cosine_similarity_between_texts(text1, text2):
     """
     计算两个文本之间的 Cosine 相似度
+    每次调用使用独立的 vectorizer，不共享可变状态，多个线程可以同时调用而无需加锁
     """
     try:
-        # 使用全局的 vectorizer，需加锁保证线程安全
-        with vectorizer_lock:
-            # 由于每次文本不同，需要重新拟合
-            tfidf_matrix = vectorizer.fit_transform([text1, text2])
-
-        # 使用稀疏矩阵计算 Cosine 相似度
-        similarity_matrix = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])
-        return similarity_matrix[0][0]
+        # 先分词再交给 vectorizer，结果与直接传入文本相同，且分词与拟合的耗时可以分别统计
+        return cosine_similarity_between_tokens(tokenize_text(text1), tokenize_text(text2))
     except Exception as e:
         print(f"计算 cosine 相似度错误: {e}")
         raise
 
-def main():
-    # 从命令行获取文件路径
-    if len(sys.argv) != 4:
-        print("用法（命令行参数输入）: python main.py <论文原文文件路径> <疑似抄袭的文件路径> <输出的答案文件路径>")
-        return
+def _fit_pair_similarity(vectorizer, document1, document2, volume):
+    """
+    用 vectorizer 在两篇文档上拟合并计算 Cosine 相似度，volume 为计入指标的词数
+    """
+    # 由于每次文本不同，需要重新拟合
+    start = time.perf_counter()
+    tfidf_matrix = vectorizer.fit_transform([document1, document2])
+    record_metric('vectorize', time.perf_counter() - start, tokens=volume)
+    if metrics is not None:
+        metrics.set_gauge('vocabulary_size', tfidf_matrix.shape[1])
 
-    orig_file_path = sys.argv[1]
-    plagiarized_file_path = sys.argv[2]
-    output_file_path = sys.argv[3]
+    # 使用稀疏矩阵计算 Cosine 相似度
+    from sklearn.metrics.pairwise import cosine_similarity
+    start = time.perf_counter()
+    similarity_matrix = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])
+    record_metric('cosine', time.perf_counter() - start, pairs=1)
+    return similarity_matrix[0][0]
 
-    # 读取原文文件和抄袭版文件
-    orig_text = read_file(orig_file_path)
-    plagiarized_text = read_file(plagiarized_file_path)
+def cosine_similarity_between_tokens(tokens1, tokens2):
+    """
+    计算两个已分词文本（tokenize_text 的结果）之间的 Cosine 相似度
+    与 cosine_similarity_between_texts 结果相同
+    """
+    try:
+        return _fit_pair_similarity(create_vectorizer(pretokenized=True), tokens1, tokens2, len(tokens1) + len(tokens2))
+    except Exception as e:
+        print(f"计算 cosine 相似度错误: {e}")
+        raise
 
-    # 预处理文本
-    orig_text = preprocess_text(orig_text)
-    plagiarized_text = preprocess_text(plagiarized_text)
+def cosine_similarity_between_char_ngrams(text1, text2, n=2):
+    """
+    快速模式：不做 Jieba 分词，直接以字符 n-gram 为特征计算 TF-IDF Cosine 相似度
+    得分与分词模式有偏差，适合初筛；偏差和加速比见 Performance_Analyze/char_ngram_eval.py
+    """
+    try:
+        volume = max(len(text1) - n + 1, 0) + max(len(text2) - n + 1, 0)
+        return _fit_pair_similarity(create_char_ngram_vectorizer(n), text1, text2, volume)
+    except Exception as e:
+        print(f"计算 cosine 相似度错误: {e}")
+        raise
 
-    # 计算相似度
-    similarity = cosine_similarity_between_texts(orig_text, plagiarized_text)
+class SimilarityModel:
+    """
+    只读的已拟合模型：词汇表和 IDF 在参考语料上拟合一次，之后的比较只调用 transform，
+    不修改模型状态，可在多个线程中共享而无需加锁
+    注意 IDF 来自参考语料，得分与 cosine_similarity_between_texts（只用两篇文本拟合）不同
+    """
 
-    # 将相似度结果写入输出文件
+    def __init__(self, fitted_vectorizer):
+        self.vectorizer = fitted_vectorizer
+
+    @classmethod
+    def fit(cls, texts):
+        """
+        在参考语料（预处理后的文本）上拟合模型
+        """
+        return cls(create_vectorizer().fit(list(texts)))
+
+    def similarity(self, text1, text2):
+        """
+        计算两个文本之间的 Cosine 相似度
+        """
+        tfidf_matrix = self.vectorizer.transform([text1, text2])
+        # transform 的结果已做 L2 归一化，点积即为 Cosine 相似度
+        return float(tfidf_matrix[0].multiply(tfidf_matrix[1]).sum())
+
+def create_similarity_executor(workers=None):
+    """
+    创建用于相似度计算的进程池，每个工作进程预先加载 Jieba 词典
+    Jieba 分词是纯 Python 代码，受 GIL 限制，线程池无法利用多核，因此默认使用进程池
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_tokenizer_worker,
+                               initargs=tokenizer_worker_initargs())
+
+async def cosine_similarity_async(text1, text2, executor=None):
+    """
+    cosine_similarity_between_texts 的 asyncio 版本：计算交给 executor 执行，不阻塞事件循环
+    executor 为 None 时使用事件循环默认的线程池；需要随工作进程数扩展吞吐量时传入 create_similarity_executor()
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, cosine_similarity_between_texts, text1, text2)
+
+def collect_files(source):
+    """
+    收集批量模式的输入文件
+    source 为目录时取其中的所有普通文件（按文件名排序）；
+    否则视为清单文件，每行一个路径，空行和以 # 开头的行会被忽略，相对路径相对于清单文件所在目录
+    """
+    if os.path.isdir(source):
+        names = sorted(os.listdir(source))
+        return [os.path.join(source, name) for name in names
+                if not name.startswith('.') and os.path.isfile(os.path.join(source, name))]
+
+    manifest_dir = os.path.dirname(os.path.abspath(source))
+    paths = []
+    for line in read_file(source).splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        paths.append(line if os.path.isabs(line) else os.path.join(manifest_dir, line))
+    return paths
+
+def batch_similarity(orig_texts, suspect_texts, workers=1, cache=None, char_ngram=None):
+    """
+    批量计算相似度：所有文本只拟合一次 vectorizer，并通过一次稀疏矩阵乘法得到全部得分
+    返回形状为 (len(suspect_texts), len(orig_texts)) 的数组，第 i 行第 j 列为第 i 篇疑似文本与第 j 篇原文的相似度
+    workers 和 cache 的含义同 tokenize_texts；char_ngram 不为 None 时使用字符 n-gram 快速模式，不分词
+    """
+    orig_texts = list(orig_texts)
+    suspect_texts = list(suspect_texts)
+    try:
+        start = time.perf_counter()
+        if char_ngram:
+            tfidf_matrix = create_char_ngram_vectorizer(char_ngram).fit_transform(orig_texts + suspect_texts)
+            volume = sum(len(text) for text in orig_texts + suspect_texts)
+        else:
+            # 先（并行）分词，再交给独立的 vectorizer；IDF 基于本批全部文本统计
+            tokens = tokenize_texts(orig_texts + suspect_texts, workers, cache=cache)
+            start = time.perf_counter()
+            tfidf_matrix = create_vectorizer(pretokenized=True).fit_transform(tokens)
+            volume = sum(len(t) for t in tokens)
+        record_metric('vectorize', time.perf_counter() - start, tokens=volume)
+        if metrics is not None:
+            metrics.set_gauge('vocabulary_size', tfidf_matrix.shape[1])
+
+        # TF-IDF 向量已做 L2 归一化，点积即为 Cosine 相似度
+        start = time.perf_counter()
+        orig_count = len(orig_texts)
+        similarity_matrix = (tfidf_matrix[orig_count:] @ tfidf_matrix[:orig_count].T).toarray()
+        record_metric('cosine', time.perf_counter() - start, pairs=similarity_matrix.size)
+        return similarity_matrix
+    except Exception as e:
+        print(f"批量计算 cosine 相似度错误: {e}")
+        raise
+
+def matrix_rows(suspect_paths, orig_paths, similarity_matrix):
+    """
+    将相似度矩阵展开为 (疑似文件, 原文, 相似度) 三元组
+    """
+    for i, suspect_path in enumerate(suspect_paths):
+        for j, orig_path in enumerate(orig_paths):
+            yield suspect_path, orig_path, similarity_matrix[i][j]
+
+def write_batch_results(output_file_path, rows):
+    """
+    将批量结果 (疑似文件, 原文, 相似度) 写入单个文件：扩展名为 .jsonl 时写 JSON Lines，否则写 CSV
+    """
+    try:
+        with open(output_file_path, 'w', encoding='utf-8', newline='') as f:
+            if output_file_path.lower().endswith('.jsonl'):
+                for suspect_path, orig_path, similarity in rows:
+                    record = {'suspect': suspect_path, 'original': orig_path, 'similarity': round(float(similarity), 2)}
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            else:
+                writer = csv.writer(f)
+                writer.writerow(['suspect', 'original', 'similarity'])
+                for suspect_path, orig_path, similarity in rows:
+                    writer.writerow([suspect_path, orig_path, f"{similarity:.2f}"])
+    except Exception as e:
+        print(f"写入 {output_file_path} 出错: {e}")
+        raise
+
+def run_batch(orig_source, suspect_source, output_file_path, lsh_options=None, workers=1, cache=None, char_ngram=None):
+    """
+    批量模式：一篇或多篇疑似文本对比多篇原文，结果写入一个 CSV/JSONL 文件
+    lsh_options 不为 None 时先用 MinHash/LSH 生成候选对，只对候选对计算 TF-IDF 相似度并输出；
+    char_ngram 不为 None 时使用字符 n-gram 快速模式（不能与 LSH 同时使用）
+    """
+    orig_paths = collect_files(orig_source)
+    suspect_paths = collect_files(suspect_source)
+    if not orig_paths or not suspect_paths:
+        raise ValueError("批量模式下原文和疑似抄袭文件都不能为空。")
+
+    orig_texts = [preprocess_text(read_file(path)) for path in orig_paths]
+    suspect_texts = [preprocess_text(read_file(path)) for path in suspect_paths]
+
+    if lsh_options is not None:
+        # 延迟导入，避免与 lsh 模块循环导入
+        from lsh import lsh_batch_similarity
+        pairs = lsh_batch_similarity(orig_texts, suspect_texts, workers=workers, cache=cache, **lsh_options)
+        rows = [(suspect_paths[i], orig_paths[j], similarity) for i, j, similarity in pairs]
+    else:
+        similarity_matrix = batch_similarity(orig_texts, suspect_texts, workers, cache, char_ngram)
+        rows = list(matrix_rows(suspect_paths, orig_paths, similarity_matrix))
+    write_batch_results(output_file_path, rows)
+    print(f"批量计算完成，共 {len(rows)} 对，结果已保存到 {output_file_path}")
+
+def write_similarity(output_file_path, similarity):
+    """
+    将相似度结果写入输出文件，保留两位小数
+    """
     try:
         with open(output_file_path, 'w', encoding='utf-8') as f:
             f.write(f"{similarity:.2f}")
@@ -84,5 +503,112 @@ def main():
         print(f"写入 {output_file_path} 出错: {e}")
         raise
 
+def main(argv=None):
+    # 从命令行获取文件路径
+    parser = argparse.ArgumentParser(description="论文查重：计算疑似抄袭文本与原文的 Cosine 相似度")
+    parser.add_argument('orig', help='论文原文文件路径（批量模式下为原文目录或清单文件）')
+    parser.add_argument('plagiarized', help='疑似抄袭的文件路径（批量模式下为疑似文件目录或清单文件）')
+    parser.add_argument('output', help='输出的答案文件路径（批量模式下为 .csv 或 .jsonl 文件）')
+    # 批量模式和流式模式互斥
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--batch', action='store_true', help='批量模式：一次拟合，计算所有疑似文件与所有原文的相似度')
+    parser.add_argument('--lsh', action='store_true', help='批量模式下先用 MinHash/LSH 筛选候选对，只输出候选对的相似度')
+    parser.add_argument('--lsh-bands', type=int, help='LSH 分段数（默认 64），越大召回越高')
+    parser.add_argument('--lsh-rows', type=int, help='LSH 每段的行数（默认 2），越大候选越少；分段数 × 行数 即 MinHash 签名长度')
+    parser.add_argument('--lsh-shingle', type=int, help='shingle 包含的连续词数（默认 1）')
+    parser.add_argument('--workers', type=int, default=1, help='分词进程数（默认 1 为单进程，0 表示使用全部 CPU 核心）')
+    mode.add_argument('--stream', action='store_true', help='流式模式：分块读取和分词，用哈希特征累加词频，内存占用与文件大小无关')
+    parser.add_argument('--char-ngram', type=int, choices=[2, 3],
+                        help='快速模式：不做 Jieba 分词，以字符 2-gram 或 3-gram 为特征计算相似度，适合初筛（得分与默认模式有偏差）')
+    parser.add_argument('--report', help='同时生成段落级匹配报告（JSON），列出匹配的句段、字符偏移和得分')
+    parser.add_argument('--metrics', help='记录各阶段耗时和计数并在结束时写出（.prom 为 Prometheus textfile，否则追加 JSON Lines）；'
+                                              '也可通过环境变量 CHECK_PLAGIARISM_METRICS 启用')
+    parser.add_argument('--token-cache', help='分词缓存文件路径（SQLite），未改变的文本不再重复分词')
+    parser.add_argument('--token-cache-mb', type=int, default=256, help='分词缓存大小上限（MB，默认 256），超出时淘汰最久未使用的条目')
+    parser.add_argument('--tokenizer-state', help='加载 tokenizer_state.py 生成的分词状态文件，跳过 Jieba 词典的加载和构建；'
+                                                      '也可通过环境变量 CHECK_PLAGIARISM_TOKENIZER_STATE 指定')
+    parser.add_argument('--result-cache', help='相似度结果缓存文件路径（SQLite），两篇文本都未改变时直接返回上次的结果')
+    parser.add_argument('--result-cache-entries', type=int, default=1000000,
+                        help='结果缓存条目上限（默认 1000000），超出时淘汰最久未使用的条目')
+    args = parser.parse_args(argv)
+
+    if args.char_ngram and (args.lsh or args.stream):
+        parser.error('--char-ngram 不能与 --lsh 或 --stream 同时使用')
+    # 未指定的 LSH 参数取 lsh_batch_similarity 的默认值
+    lsh_tuning = {'bands': args.lsh_bands, 'rows': args.lsh_rows, 'shingle_size': args.lsh_shingle}
+    lsh_tuning = {name: value for name, value in lsh_tuning.items() if value is not None}
+    if (args.lsh or lsh_tuning) and not args.batch:
+        parser.error('--lsh、--lsh-bands、--lsh-rows、--lsh-shingle 只能用于批量模式（--batch）')
+    if lsh_tuning and not args.lsh:
+        parser.error('--lsh-bands、--lsh-rows、--lsh-shingle 需要与 --lsh 同时使用')
+    if args.stream and (args.workers != 1 or args.token_cache):
+        parser.error('--stream 按块单进程分词，不能与 --workers 或 --token-cache 同时使用')
+    if args.report and (args.batch or args.stream):
+        parser.error('--report 只能用于单对文件模式，不能与 --batch 或 --stream 同时使用')
+    if args.result_cache and (args.batch or args.stream):
+        parser.error('--result-cache 只能用于单对文件模式，不能与 --batch 或 --stream 同时使用')
+
+    if args.metrics:
+        enable_metrics(args.metrics)
+    if args.tokenizer_state:
+        load_tokenizer_state(args.tokenizer_state)
+
+    cache = None
+    if args.token_cache:
+        from token_cache import TokenCache
+        cache = TokenCache(args.token_cache, tokenizer_fingerprint(), args.token_cache_mb * 1024 * 1024)
+
+    if args.batch:
+        lsh_options = lsh_tuning if args.lsh else None
+        run_batch(args.orig, args.plagiarized, args.output, lsh_options, args.workers, cache, args.char_ngram)
+        return
+
+    orig_file_path = args.orig
+    plagiarized_file_path = args.plagiarized
+    output_file_path = args.output
+
+    if args.stream:
+        from streaming import stream_similarity
+        similarity = stream_similarity(orig_file_path, plagiarized_file_path)
+        write_similarity(output_file_path, similarity)
+        return
+
+    # 读取原文文件和抄袭版文件
+    orig_raw_text = read_file(orig_file_path)
+    plagiarized_raw_text = read_file(plagiarized_file_path)
+
+    # 预处理文本
+    orig_text = preprocess_text(orig_raw_text)
+    plagiarized_text = preprocess_text(plagiarized_raw_text)
+
+    result_cache = None
+    similarity = None
+    if args.result_cache:
+        from result_cache import ResultCache
+        result_cache = ResultCache(args.result_cache, similarity_fingerprint(args.char_ngram), args.result_cache_entries)
+        similarity = result_cache.get(orig_text, plagiarized_text)
+
+    # 计算相似度（结果缓存命中时跳过分词和向量化）
+    if similarity is None:
+        if args.char_ngram:
+            similarity = cosine_similarity_between_char_ngrams(orig_text, plagiarized_text, args.char_ngram)
+        elif args.workers == 1 and cache is None:
+            similarity = cosine_similarity_between_texts(orig_text, plagiarized_text)
+        else:
+            orig_tokens, plagiarized_tokens = tokenize_texts([orig_text, plagiarized_text], args.workers, cache=cache)
+            similarity = cosine_similarity_between_tokens(orig_tokens, plagiarized_tokens)
+        if result_cache is not None:
+            result_cache.put(orig_text, plagiarized_text, similarity)
+    if result_cache is not None:
+        result_cache.close()
+
+    # 将相似度结果写入输出文件
+    write_similarity(output_file_path, similarity)
+
+    if args.report:
+        # 报告中的偏移基于原始文本，因此传入未预处理的内容
+        from passage_report import write_report
+        write_report(args.report, orig_file_path, plagiarized_file_path, orig_raw_text, plagiarized_raw_text, similarity)
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,159 @@
+import re
+import json
+import zlib
+from collections import defaultdict
+
+from main import preprocess_text, tokenize_text
+
+# 句子结束符：中英文句号、问号、感叹号、分号以及换行
+SENTENCE_END = re.compile(r'[。！？!?；;\n]+')
+
+# 同一指纹在原文中出现超过该次数时视为套话，不参与匹配，避免退化为平方复杂度
+MAX_POSTINGS = 50
+
+
+def split_sentences(text):
+    """
+    将文本切分为句子，返回 (起始偏移, 结束偏移) 列表，偏移为字符下标，不含句末空白
+    """
+    spans = []
+    start = 0
+    for match in SENTENCE_END.finditer(text):
+        end = match.end()
+        if text[start:end].strip():
+            spans.append((start, end))
+        start = end
+    if text[start:].strip():
+        spans.append((start, len(text)))
+    # 去掉句首句尾的空白，使偏移直接指向文字
+    result = []
+    for start, end in spans:
+        sentence = text[start:end]
+        left = len(sentence) - len(sentence.lstrip())
+        right = len(sentence.rstrip())
+        result.append((start + left, start + right))
+    return result
+
+
+def fingerprint_sentences(text, spans, k=2, window=3):
+    """
+    对全文的词序列做 k-gram 哈希并用 winnowing 选取指纹
+    返回 (指纹列表 [(哈希, 所在句子下标)], 每个句子的指纹数)
+    任意长度不小于 window + k - 1 个词的公共片段都至少会产生一个公共指纹
+    """
+    words = []
+    owners = []
+    for sentence_id, (start, end) in enumerate(spans):
+        for token in tokenize_text(preprocess_text(text[start:end])):
+            if token.strip():
+                words.append(token)
+                owners.append(sentence_id)
+
+    gram_count = len(words) - k + 1
+    if gram_count <= 0:
+        return [], [0] * len(spans)
+    hashes = [zlib.crc32('\x00'.join(words[i:i + k]).encode('utf-8')) for i in range(gram_count)]
+
+    # winnowing：每个窗口取最小哈希（取最右侧的最小值），相邻窗口选中同一位置时只记录一次
+    selected = []
+    last = -1
+    for start in range(max(1, gram_count - window + 1)):
+        window_hashes = hashes[start:start + window]
+        best = min(range(len(window_hashes)), key=lambda i: (window_hashes[i], -i)) + start
+        if best != last:
+            selected.append(best)
+            last = best
+
+    fingerprints = [(hashes[i], owners[i]) for i in selected]
+    counts = [0] * len(spans)
+    for _, sentence_id in fingerprints:
+        counts[sentence_id] += 1
+    return fingerprints, counts
+
+
+def match_passages(orig_text, suspect_text, k=2, window=3, min_score=0.2, min_shared=3, max_gap=1):
+    """
+    定位疑似抄袭文本中与原文匹配的段落
+    先为每个疑似句子找到共享指纹最多的原文句子，再把原文和疑似文本中位置都相邻的句子对合并为段落
+    返回段落列表，每项包含两边的字符偏移、文本、共享指纹数以及得分（共享指纹数 / 疑似段落的指纹数）；
+    得分低于 min_score 或共享指纹少于 min_shared 的段落不输出，后者用于排除短句中常见词组的偶然重合
+    """
+    orig_spans = split_sentences(orig_text)
+    suspect_spans = split_sentences(suspect_text)
+    orig_fingerprints, _ = fingerprint_sentences(orig_text, orig_spans, k, window)
+    suspect_fingerprints, suspect_counts = fingerprint_sentences(suspect_text, suspect_spans, k, window)
+
+    index = defaultdict(list)
+    for fingerprint, sentence_id in orig_fingerprints:
+        index[fingerprint].append(sentence_id)
+
+    # shared[疑似句子][原文句子] = 共享指纹数
+    shared = defaultdict(lambda: defaultdict(int))
+    for fingerprint, suspect_id in suspect_fingerprints:
+        postings = index.get(fingerprint, ())
+        if len(postings) > MAX_POSTINGS:
+            continue
+        for orig_id in set(postings):
+            shared[suspect_id][orig_id] += 1
+
+    best_pairs = []
+    for suspect_id in sorted(shared):
+        orig_id, count = max(shared[suspect_id].items(), key=lambda item: (item[1], -item[0]))
+        best_pairs.append((suspect_id, orig_id, count))
+
+    # 合并相邻的句子对
+    passages = []
+    for suspect_id, orig_id, count in best_pairs:
+        if passages:
+            last = passages[-1]
+            if (0 < suspect_id - last['suspect_last'] <= max_gap + 1
+                    and 0 <= orig_id - last['orig_last'] <= max_gap + 1):
+                last['suspect_last'] = suspect_id
+                last['orig_last'] = orig_id
+                last['shared'] += count
+                last['fingerprints'] += sum(suspect_counts[last['suspect_end']:suspect_id + 1])
+                last['suspect_end'] = suspect_id + 1
+                continue
+        passages.append({
+            'suspect_first': suspect_id, 'suspect_last': suspect_id, 'suspect_end': suspect_id + 1,
+            'orig_first': orig_id, 'orig_last': orig_id,
+            'shared': count, 'fingerprints': suspect_counts[suspect_id],
+        })
+
+    results = []
+    for passage in passages:
+        score = min(1.0, passage['shared'] / passage['fingerprints']) if passage['fingerprints'] else 0.0
+        if score < min_score or passage['shared'] < min_shared:
+            continue
+        orig_start = orig_spans[passage['orig_first']][0]
+        orig_end = orig_spans[passage['orig_last']][1]
+        suspect_start = suspect_spans[passage['suspect_first']][0]
+        suspect_end = suspect_spans[passage['suspect_last']][1]
+        results.append({
+            'orig': {'start': orig_start, 'end': orig_end, 'text': orig_text[orig_start:orig_end]},
+            'suspect': {'start': suspect_start, 'end': suspect_end, 'text': suspect_text[suspect_start:suspect_end]},
+            'shared_fingerprints': passage['shared'],
+            'score': round(score, 4),
+        })
+    return results
+
+
+def write_report(report_path, orig_file_path, suspect_file_path, orig_text, suspect_text, similarity, **options):
+    """
+    生成段落级匹配报告（JSON）
+    """
+    passages = match_passages(orig_text, suspect_text, **options)
+    report = {
+        'orig_file': orig_file_path,
+        'suspect_file': suspect_file_path,
+        'similarity': round(float(similarity), 4),
+        'passages': passages,
+    }
+    try:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"段落匹配报告已保存到 {report_path}，共 {len(passages)} 处匹配")
+    except Exception as e:
+        print(f"写入 {report_path} 出错: {e}")
+        raise
+    return report
@@ -0,0 +1,79 @@
+import time
+import sqlite3
+import hashlib
+
+# 默认最多保存 100 万条结果，每条约 100 字节
+DEFAULT_MAX_ENTRIES = 1000000
+
+
+class ResultCache:
+    """
+    持久化的单对相似度结果缓存（SQLite）
+    键为 sha256(模型配置指纹 + 两篇预处理后文本的 sha256)，两篇文本的摘要排序后参与计算，
+    因此交换原文和疑似文本命中同一条目（TF-IDF Cosine 相似度是对称的）；
+    条目数超过 max_entries 时按最近访问时间淘汰（LRU）
+    多个查重进程可以同时使用同一个缓存文件：WAL 模式下读写互不阻塞，写操作在锁超时内排队
+    """
+
+    def __init__(self, path, fingerprint, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, similarity REAL NOT NULL, last_access REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)')
+
+    def key(self, text1, text2):
+        """
+        计算一对文本在当前模型配置下的缓存键，与两篇文本的先后顺序无关
+        """
+        digests = sorted(hashlib.sha256(text.encode('utf-8')).hexdigest() for text in (text1, text2))
+        digest = hashlib.sha256(self.fingerprint.encode('utf-8'))
+        for text_digest in digests:
+            digest.update(b'\x00')
+            digest.update(text_digest.encode('ascii'))
+        return digest.hexdigest()
+
+    def get(self, text1, text2):
+        """
+        查询一对文本的相似度，未命中时返回 None；命中的条目会刷新访问时间
+        """
+        key = self.key(text1, text2)
+        row = self._conn.execute('SELECT similarity FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        with self._conn:
+            self._conn.execute('UPDATE results SET last_access = ? WHERE key = ?', (time.time(), key))
+        return row[0]
+
+    def put(self, text1, text2, similarity):
+        """
+        写入一对文本的相似度，写入后按需淘汰
+        """
+        with self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO results (key, similarity, last_access) VALUES (?, ?, ?)',
+                               (self.key(text1, text2), float(similarity), time.time()))
+        self.evict()
+
+    def evict(self):
+        """
+        删除最久未访问的条目，直到条目数不超过 max_entries
+        """
+        excess = len(self) - self.max_entries
+        if excess <= 0:
+            return
+        with self._conn:
+            self._conn.execute(
+                'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_access LIMIT ?)', (excess,)
+            )
+
+    def __len__(self):
+        return self._conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def close(self):
+        self._conn.close()
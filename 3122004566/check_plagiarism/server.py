@@ -0,0 +1,112 @@
+import os
+import json
+import argparse
+import tempfile
+import socketserver
+from concurrent.futures import ProcessPoolExecutor
+
+import jieba
+from main import (preprocess_text, tokenize_text, cosine_similarity_between_tokens, _init_tokenizer_worker,
+                  tokenizer_worker_initargs, flush_metrics)
+
+# 默认的 Unix 域套接字路径，client.py 使用同一个默认值
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), 'check_plagiarism.sock')
+
+
+def score_texts(orig_text, plagiarized_text):
+    """
+    对两段原始文本做预处理、分词并计算相似度，与命令行单对模式结果相同
+    """
+    orig_tokens = tokenize_text(preprocess_text(orig_text))
+    plagiarized_tokens = tokenize_text(preprocess_text(plagiarized_text))
+    return float(cosine_similarity_between_tokens(orig_tokens, plagiarized_tokens))
+
+
+class SimilarityRequestHandler(socketserver.StreamRequestHandler):
+    """
+    每行一个 JSON 请求 {"orig": 原文, "plagiarized": 疑似抄袭文本}，
+    每行一个 JSON 响应 {"similarity": 相似度} 或 {"error": 错误信息}；一个连接可以发送多个请求
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                similarity = self.server.score(request['orig'], request['plagiarized'])
+                response = {'similarity': similarity}
+            except Exception as e:
+                response = {'error': f"{type(e).__name__}: {e}"}
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8'))
+            self.wfile.flush()
+            # 启用指标时每个请求后写出一次，便于在线观察
+            flush_metrics()
+
+
+class _WarmServerMixin:
+    daemon_threads = True
+    executor = None
+
+    def score(self, orig_text, plagiarized_text):
+        if self.executor is None:
+            return score_texts(orig_text, plagiarized_text)
+        # 多进程模式：请求线程只负责收发，计算交给已预热的工作进程
+        return self.executor.submit(score_texts, orig_text, plagiarized_text).result()
+
+
+class UnixSimilarityServer(_WarmServerMixin, socketserver.ThreadingUnixStreamServer):
+    pass
+
+
+class TCPSimilarityServer(_WarmServerMixin, socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+
+
+def warm_up():
+    """
+    预先加载 Jieba 词典并完成一次完整计算，使后续请求不再有冷启动开销
+    """
+    jieba.initialize()
+    score_texts("今天天气晴朗", "今天天气不错")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="论文查重常驻服务：保持 Jieba 和 sklearn 预热，供 client.py 调用")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH, help=f'Unix 域套接字路径（默认 {DEFAULT_SOCKET_PATH}）')
+    parser.add_argument('--port', type=int, help='改为监听 127.0.0.1 上的 TCP 端口')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='计算进程数（默认 1 在请求线程内计算，大于 1 时使用预热的进程池，0 表示全部 CPU 核心）')
+    args = parser.parse_args(argv)
+
+    warm_up()
+    if args.port is not None:
+        server = TCPSimilarityServer(('127.0.0.1', args.port), SimilarityRequestHandler)
+        address = f"127.0.0.1:{args.port}"
+    else:
+        # 清理上次异常退出留下的套接字文件
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        server = UnixSimilarityServer(args.socket, SimilarityRequestHandler)
+        address = args.socket
+
+    if args.workers != 1:
+        # 在预热之后创建进程池，fork 出的工作进程直接继承已加载的词典；其他启动方式由 initializer 加载分词状态
+        server.executor = ProcessPoolExecutor(max_workers=args.workers or None, initializer=_init_tokenizer_worker,
+                                              initargs=tokenizer_worker_initargs())
+
+    print(f"查重服务已启动，监听 {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if server.executor is not None:
+            server.executor.shutdown()
+        if args.port is None and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from main import preprocess_text, tokenize_text, _pretokenized_analyzer
+
+# 默认特征空间大小 2^20，计数向量约占 8 MB，与文档大小无关
+DEFAULT_FEATURES = 1 << 20
+# 默认每次读取约 1M 个字符
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def iter_text_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    分块读取 UTF-8 文本文件，每块尽量在最后一个换行符之后截断
+    换行符在预处理后仍然保留，是 Jieba 的分块边界，因此逐块分词与整篇分词结果相同；
+    超长且没有换行的段落退而在空白符处截断，再没有则直接截断，保证内存占用有上限
+    """
+    pending = ''
+    with open(file_path, 'r', encoding='utf-8') as f:
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            text = pending + block
+            cut = text.rfind('\n') + 1
+            if cut == 0 and len(text) >= 2 * chunk_size:
+                cut = max(text.rfind(' '), text.rfind('\t')) + 1 or len(text)
+            if cut == 0:
+                pending = text
+                continue
+            pending = text[cut:]
+            yield text[:cut]
+    if pending:
+        yield pending
+
+
+def stream_term_counts(file_path, n_features=DEFAULT_FEATURES, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    流式统计文件的词频：逐块预处理、分词，并用哈希技巧累加到固定大小的计数向量中
+    """
+    hasher = HashingVectorizer(analyzer=_pretokenized_analyzer, n_features=n_features,
+                               alternate_sign=False, norm=None)
+    counts = np.zeros(n_features, dtype=np.float64)
+    empty = True
+    try:
+        for chunk in iter_text_chunks(file_path, chunk_size):
+            empty = False
+            chunk_counts = hasher.transform([tokenize_text(preprocess_text(chunk))])
+            # 单行稀疏矩阵的列下标互不重复，可以直接累加
+            counts[chunk_counts.indices] += chunk_counts.data
+    except FileNotFoundError:
+        print(f"未找到文件 {file_path}")
+        raise
+    if empty:
+        raise ValueError(f"文件 {file_path} 为空。")
+    return counts
+
+
+def hashed_tfidf_similarity(counts1, counts2):
+    """
+    按 TfidfVectorizer 的默认设置（smooth_idf、L2 归一化）对两篇文档的计数向量加权并计算 Cosine 相似度
+    除哈希冲突外与 cosine_similarity_between_texts 的结果一致
+    """
+    df = (counts1 > 0).astype(np.float64) + (counts2 > 0)
+    idf = np.log(3.0 / (1.0 + df)) + 1.0
+    vector1 = counts1 * idf
+    vector2 = counts2 * idf
+    norm = np.linalg.norm(vector1) * np.linalg.norm(vector2)
+    if norm == 0:
+        return 0.0
+    return float(vector1 @ vector2 / norm)
+
+
+def stream_similarity(file_path1, file_path2, n_features=DEFAULT_FEATURES, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    流式计算两个文件的相似度，峰值内存只取决于 chunk_size 和 n_features，与文件大小无关
+    """
+    counts1 = stream_term_counts(file_path1, n_features, chunk_size)
+    counts2 = stream_term_counts(file_path2, n_features, chunk_size)
+    return hashed_tfidf_similarity(counts1, counts2)
@@ -0,0 +1,101 @@
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+
+# 默认缓存上限 256 MB（按压缩后的分词结果计）
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class TokenCache:
+    """
+    按内容寻址的持久化分词缓存（SQLite）
+    键为 sha256(分词配置指纹 + 预处理后的文本)，值为 zlib 压缩的 JSON 词序列；
+    总大小超过 max_bytes 时按最近访问时间淘汰（LRU）
+    多个进程可以同时使用同一个缓存文件
+    """
+
+    def __init__(self, path, fingerprint, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.max_bytes = max_bytes
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS tokens ('
+                'key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS tokens_last_access ON tokens (last_access)')
+
+    def key(self, text):
+        """
+        计算文本在当前分词配置下的缓存键
+        """
+        digest = hashlib.sha256(self.fingerprint.encode('utf-8'))
+        digest.update(b'\x00')
+        digest.update(text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get_many(self, texts):
+        """
+        批量查询，返回与 texts 对应的列表，未命中的位置为 None；命中的条目会刷新访问时间
+        """
+        keys = [self.key(text) for text in texts]
+        found = {}
+        # 分批查询，避免超过 SQLite 的参数个数上限
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            rows = self._conn.execute(f'SELECT key, data FROM tokens WHERE key IN ({placeholders})', batch)
+            for key, data in rows:
+                found[key] = json.loads(zlib.decompress(data).decode('utf-8'))
+        if found:
+            now = time.time()
+            with self._conn:
+                self._conn.executemany('UPDATE tokens SET last_access = ? WHERE key = ?',
+                                       [(now, key) for key in found])
+        return [found.get(key) for key in keys]
+
+    def put_many(self, texts, token_lists):
+        """
+        批量写入分词结果，写入后按需淘汰
+        """
+        now = time.time()
+        rows = []
+        for text, tokens in zip(texts, token_lists):
+            data = zlib.compress(json.dumps(tokens, ensure_ascii=False).encode('utf-8'))
+            rows.append((self.key(text), data, len(data), now))
+        if not rows:
+            return
+        with self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO tokens (key, data, size, last_access) VALUES (?, ?, ?, ?)',
+                                   rows)
+        self.evict()
+
+    def total_bytes(self):
+        return self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM tokens').fetchone()[0]
+
+    def evict(self):
+        """
+        删除最久未访问的条目，直到总大小不超过 max_bytes
+        """
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        with self._conn:
+            freed = 0
+            stale = []
+            for key, size in self._conn.execute('SELECT key, size FROM tokens ORDER BY last_access'):
+                if freed >= excess:
+                    break
+                stale.append((key,))
+                freed += size
+            self._conn.executemany('DELETE FROM tokens WHERE key = ?', stale)
+
+    def __len__(self):
+        return self._conn.execute('SELECT COUNT(*) FROM tokens').fetchone()[0]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,312 @@
+import os
+import sys
+import json
+import time
+import queue
+import select
+import signal
+import struct
+import ctypes
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from main import (read_file, preprocess_text, tokenize_text, cosine_similarity_between_tokens, collect_files,
+                  _init_tokenizer_worker, tokenizer_worker_initargs)
+
+# inotify 事件掩码：写入完成后关闭、被移入目录、事件队列溢出
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+INOTIFY_EVENT = struct.Struct('iIII')
+
+# 轮询模式下文件最后修改后需要静置的秒数，避免读到仍在上传的文件
+SETTLE_SECONDS = 1.0
+
+# 队列中的结束标记
+_DONE = object()
+
+# 工作进程中的原文分词结果，由 _init_worker 设置
+_orig_tokens = None
+
+
+def _init_worker(orig_tokens, state_path=None):
+    # 每个工作进程只加载一次 Jieba 词典和分词状态，原文分词结果随 initargs 传入一次
+    global _orig_tokens
+    _init_tokenizer_worker(state_path)
+    _orig_tokens = orig_tokens
+
+
+def score_text(raw_text):
+    """
+    在工作进程中完成预处理、分词和打分，返回与每篇原文的相似度列表
+    三个阶段都是受 GIL 限制的纯 Python 计算，放在同一个进程任务中，避免在进程间传递词序列
+    """
+    tokens = tokenize_text(preprocess_text(raw_text))
+    return [float(cosine_similarity_between_tokens(orig, tokens)) for orig in _orig_tokens]
+
+
+def unique_path(directory, name):
+    """
+    返回 directory 中还不存在的文件路径：name 已被占用时依次尝试 name.1、name.2 …（加在扩展名之前），
+    同名文件重复提交时不会覆盖之前处理过的文件
+    """
+    path = os.path.join(directory, name)
+    stem, ext = os.path.splitext(name)
+    sequence = 0
+    while os.path.exists(path):
+        sequence += 1
+        path = os.path.join(directory, f"{stem}.{sequence}{ext}")
+    return path
+
+
+class InotifyWatcher:
+    """
+    基于 ctypes 调用 Linux inotify 的目录监视器，不可用时构造函数抛出 OSError
+    """
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"无法监视目录 {directory}")
+
+    def wait(self, timeout):
+        """
+        等待最多 timeout 秒，返回 (新文件名列表, 是否发生队列溢出)
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return [], False
+        buffer = os.read(self._fd, 64 * 1024)
+        names = []
+        overflow = False
+        offset = 0
+        while offset < len(buffer):
+            _, mask, _, length = INOTIFY_EVENT.unpack_from(buffer, offset)
+            offset += INOTIFY_EVENT.size
+            name = buffer[offset:offset + length].rstrip(b'\x00')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+            elif name:
+                names.append(os.fsdecode(name))
+        return names, overflow
+
+    def close(self):
+        os.close(self._fd)
+
+
+class InboxPipeline:
+    """
+    持续查重流水线：监视收件目录，新文件依次经过 读取 → 预处理/分词/打分 → 写出 三个并发阶段
+    阶段之间是有界队列，下游跟不上时上游阻塞（背压），任意时刻在内存中的文件数不超过 queue_size 的常数倍；
+    每个文件处理完立即向 results_path 追加与每篇原文的相似度（JSON Lines，格式同批量模式），
+    失败的文件写入 errors_path；处理后的文件移入 done_dir 或 failed_dir，目录中剩下的就是待处理的文件；
+    同名文件再次提交时移入后的文件名加上序号，记录中的路径指向各自移入后的文件
+    """
+
+    def __init__(self, inbox, orig_paths, results_path, errors_path, done_dir=None, failed_dir=None,
+                 workers=0, queue_size=64, poll_interval=1.0, use_inotify=True):
+        self.inbox = inbox
+        self.orig_paths = list(orig_paths)
+        self.results_path = results_path
+        self.errors_path = errors_path
+        self.done_dir = done_dir or os.path.join(inbox, 'processed')
+        self.failed_dir = failed_dir or os.path.join(inbox, 'failed')
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.stop_event = threading.Event()
+        self.processed = 0
+        self.failed = 0
+        # 已入队但尚未移走的文件名，防止重复处理
+        self._in_flight = set()
+        self._in_flight_lock = threading.Lock()
+        self._paths = queue.Queue(maxsize=queue_size)
+        self._texts = queue.Queue(maxsize=queue_size)
+        self._pending = queue.Queue(maxsize=queue_size)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _ready_names(self, names=None, settle=0.0):
+        """
+        筛选出可以处理的文件：普通文件、不以 . 开头（上传中的临时文件）、不在处理中、已静置 settle 秒
+        names 为 None 时扫描整个目录
+        """
+        if names is None:
+            names = sorted(os.listdir(self.inbox))
+        now = time.time()
+        ready = []
+        for name in names:
+            path = os.path.join(self.inbox, name)
+            if name.startswith('.') or name in self._in_flight:
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if not os.path.isfile(path) or now - stat.st_mtime < settle:
+                continue
+            ready.append(name)
+        return ready
+
+    def _enqueue(self, names):
+        for name in names:
+            with self._in_flight_lock:
+                if name in self._in_flight:
+                    continue
+                self._in_flight.add(name)
+            # 队列满时阻塞，直到下游腾出空间
+            while not self.stop_event.is_set():
+                try:
+                    self._paths.put(name, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+
+    def _discover(self, once):
+        """
+        发现阶段：先处理目录中已有的文件，之后用 inotify 等待新文件，不可用时退回定时轮询
+        """
+        watcher = None
+        if not once and self.use_inotify and sys.platform.startswith('linux'):
+            try:
+                watcher = InotifyWatcher(self.inbox)
+            except OSError as e:
+                print(f"inotify 不可用，改为每 {self.poll_interval} 秒轮询: {e}")
+        try:
+            # 先建立监视再扫描，扫描期间到达的文件也不会遗漏
+            self._enqueue(self._ready_names())
+            while not once and not self.stop_event.is_set():
+                if watcher is not None:
+                    names, overflow = watcher.wait(self.poll_interval)
+                    self._enqueue(self._ready_names(None if overflow else names))
+                else:
+                    self.stop_event.wait(self.poll_interval)
+                    self._enqueue(self._ready_names(settle=SETTLE_SECONDS))
+        finally:
+            if watcher is not None:
+                watcher.close()
+            self._paths.put(_DONE)
+
+    def _read(self):
+        """
+        读取阶段：I/O 在线程中进行，与工作进程的计算重叠
+        """
+        while True:
+            name = self._paths.get()
+            if name is _DONE:
+                self._texts.put(_DONE)
+                return
+            try:
+                self._texts.put((name, read_file(os.path.join(self.inbox, name)), None))
+            except Exception as e:
+                self._texts.put((name, None, f"{type(e).__name__}: {e}"))
+
+    def _dispatch(self, pool):
+        """
+        计算阶段：提交到进程池，未完成的任务数受 _pending 队列长度限制
+        """
+        while True:
+            item = self._texts.get()
+            if item is _DONE:
+                self._pending.put(_DONE)
+                return
+            name, text, error = item
+            future = pool.submit(score_text, text) if error is None else None
+            self._pending.put((name, future, error))
+
+    def _write(self, results_file, errors_file):
+        """
+        写出阶段：按提交顺序收集结果，每个文件处理完立即写出并移走
+        """
+        while True:
+            item = self._pending.get()
+            if item is _DONE:
+                return
+            name, future, error = item
+            scores = None
+            if future is not None:
+                try:
+                    scores = future.result()
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+            if error is None:
+                moved = unique_path(self.done_dir, name)
+                for orig_path, similarity in zip(self.orig_paths, scores):
+                    record = {'suspect': moved, 'original': orig_path, 'similarity': round(similarity, 2)}
+                    results_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+                results_file.flush()
+                self.processed += 1
+            else:
+                moved = unique_path(self.failed_dir, name)
+                errors_file.write(json.dumps({'suspect': moved, 'error': error}, ensure_ascii=False) + '\n')
+                errors_file.flush()
+                self.failed += 1
+            try:
+                os.replace(os.path.join(self.inbox, name), moved)
+            except OSError as e:
+                print(f"移动文件 {name} 出错: {e}")
+            with self._in_flight_lock:
+                self._in_flight.discard(name)
+
+    def run(self, once=False):
+        """
+        运行流水线；once 为 True 时只处理目录中已有的文件，处理完后返回，否则一直运行到 stop()
+        """
+        os.makedirs(self.done_dir, exist_ok=True)
+        os.makedirs(self.failed_dir, exist_ok=True)
+        orig_tokens = [tokenize_text(preprocess_text(read_file(path))) for path in self.orig_paths]
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(orig_tokens,) + tokenizer_worker_initargs()) as pool, \
+                open(self.results_path, 'a', encoding='utf-8') as results_file, \
+                open(self.errors_path, 'a', encoding='utf-8') as errors_file:
+            threads = [
+                threading.Thread(target=self._discover, args=(once,), daemon=True),
+                threading.Thread(target=self._read, daemon=True),
+                threading.Thread(target=self._dispatch, args=(pool,), daemon=True),
+            ]
+            for thread in threads:
+                thread.start()
+            self._write(results_file, errors_file)
+            for thread in threads:
+                thread.join()
+        return self.processed, self.failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="持续查重：监视收件目录，新上传的文件自动与原文比对")
+    parser.add_argument('inbox', help='收件目录，上传的文件放在这里（以 . 开头的文件视为上传中，不处理）')
+    parser.add_argument('orig', help='原文文件或原文目录（目录中的每个文件都参与比对）')
+    parser.add_argument('results', help='结果文件路径（JSON Lines，追加写入）')
+    parser.add_argument('--errors', help='失败记录文件路径（默认为结果文件名加 .errors.jsonl）')
+    parser.add_argument('--done-dir', help='处理完成的文件移入的目录（默认 <inbox>/processed）')
+    parser.add_argument('--failed-dir', help='处理失败的文件移入的目录（默认 <inbox>/failed）')
+    parser.add_argument('--workers', type=int, default=0, help='计算进程数（默认 0 表示使用全部 CPU 核心）')
+    parser.add_argument('--queue-size', type=int, default=64, help='各阶段之间队列的长度上限（默认 64）')
+    parser.add_argument('--poll-interval', type=float, default=1.0, help='轮询间隔秒数（默认 1），inotify 可用时仅作为等待超时')
+    parser.add_argument('--poll', action='store_true', help='不使用 inotify，强制轮询')
+    parser.add_argument('--once', action='store_true', help='只处理目录中已有的文件，处理完后退出')
+    args = parser.parse_args(argv)
+
+    orig_paths = collect_files(args.orig) if os.path.isdir(args.orig) else [args.orig]
+    errors_path = args.errors or os.path.splitext(args.results)[0] + '.errors.jsonl'
+    pipeline = InboxPipeline(args.inbox, orig_paths, args.results, errors_path, args.done_dir, args.failed_dir,
+                             args.workers, args.queue_size, args.poll_interval, not args.poll)
+    signal.signal(signal.SIGTERM, lambda signum, frame: pipeline.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: pipeline.stop())
+    if not args.once:
+        print(f"正在监视 {args.inbox}，按 Ctrl+C 停止")
+    processed, failed = pipeline.run(once=args.once)
+    print(f"共处理 {processed} 个文件，失败 {failed} 个，结果已保存到 {args.results}")
+
+
+if __name__ == '__main__':
+    main()